@@ -1,25 +1,60 @@
 # ltr390_constants.py
 
-# Constants for measurement settings
-e20bit = 0  # 20-bit data
-e19bit = 16 # 19-bit data
-e18bit = 32 # 18-bit data
-e17bit = 48 # 17-bit data
-e16bit = 64 # 16-bit data
-e13bit = 80 # 13-bit data
-
-# Constants for gain settings
-eGain1 = 0  # Gain of 1
-eGain3 = 1  # Gain of 3
-eGain6 = 2  # Gain of 6
-eGain9 = 3  # Gain of 9
-eGain18 = 4 # Gain of 18
-
-# Constants for sampling time
-e25ms = 0   # Sampling time of 25ms
-e50ms = 1   # Sampling time of 50ms
-e100ms = 2  # Sampling time of 100ms
-e200ms = 3  # Sampling time of 200ms
-e500ms = 4  # Sampling time of 500ms
-e1000ms = 5 # Sampling time of 1000ms
-e2000ms = 6 # Sampling time of 2000ms
+from enum import IntEnum, IntFlag
+
+
+class Resolution(IntFlag):
+    """Measurement resolution bits (ALS/UVS MEAS_RATE register, bits 4-6).
+
+    IntFlag so a resolution can be OR-combined with a SamplingTime into
+    the single register value the driver writes.
+    """
+    BIT_20 = 0   # 20-bit data
+    BIT_19 = 16  # 19-bit data
+    BIT_18 = 32  # 18-bit data
+    BIT_17 = 48  # 17-bit data
+    BIT_16 = 64  # 16-bit data
+    BIT_13 = 80  # 13-bit data
+
+
+class Gain(IntEnum):
+    """Gain range settings (ALS/UVS GAIN register)."""
+    GAIN_1 = 0   # Gain of 1
+    GAIN_3 = 1   # Gain of 3
+    GAIN_6 = 2   # Gain of 6
+    GAIN_9 = 3   # Gain of 9
+    GAIN_18 = 4  # Gain of 18
+
+
+class SamplingTime(IntFlag):
+    """Measurement rate bits (ALS/UVS MEAS_RATE register, bits 0-2)."""
+    MS_25 = 0    # Sampling time of 25ms
+    MS_50 = 1    # Sampling time of 50ms
+    MS_100 = 2   # Sampling time of 100ms
+    MS_200 = 3   # Sampling time of 200ms
+    MS_500 = 4   # Sampling time of 500ms
+    MS_1000 = 5  # Sampling time of 1000ms
+    MS_2000 = 6  # Sampling time of 2000ms
+
+
+# Backwards-compatible aliases for the original loose module constants
+e20bit = Resolution.BIT_20
+e19bit = Resolution.BIT_19
+e18bit = Resolution.BIT_18
+e17bit = Resolution.BIT_17
+e16bit = Resolution.BIT_16
+e13bit = Resolution.BIT_13
+
+eGain1 = Gain.GAIN_1
+eGain3 = Gain.GAIN_3
+eGain6 = Gain.GAIN_6
+eGain9 = Gain.GAIN_9
+eGain18 = Gain.GAIN_18
+
+e25ms = SamplingTime.MS_25
+e50ms = SamplingTime.MS_50
+e100ms = SamplingTime.MS_100
+e200ms = SamplingTime.MS_200
+e500ms = SamplingTime.MS_500
+e1000ms = SamplingTime.MS_1000
+e2000ms = SamplingTime.MS_2000
@@ -1,9 +1,8 @@
 import streamlit as st
-import pandas as pd
 from streamlit_autorefresh import st_autorefresh
 from utils.data_processing_influx import (
     get_influxdb_client,
-    update_df_from_db,
+    fetch_current_and_prev,
     calculate_uv_index,
     temperature_description,
     humidity_description,
@@ -16,17 +15,34 @@ from utils.data_processing_influx import (
     calculate_heat_index,
     heat_index_description,
     calculate_iaq,
+    get_latest_row,
     get_theme_css,
 )
 from utils.sidebar import render_sidebar
-import numpy as np
+from string import Template
+
+# Compiled once at import; each rerun only substitutes the card fields
+# instead of re-parsing eight multi-line f-strings.
+_CARD_TMPL = Template("""
+    <div class="metric-container">
+        <div class="metric-label">$label</div>
+        <div class="metric-value">$value</div>
+        <div class="$delta_class">
+            Change: $delta
+        </div>
+        <div class="metric-description">$description</div>
+    </div>
+    """)
 
 
 # ────────────────────────────────────────────────────────────────────
 # Page config & auto‑refresh
 # ────────────────────────────────────────────────────────────────────
 st.set_page_config(page_title="Home", page_icon="🏠", layout="wide")
-st_autorefresh(interval=30000, key="data_refresh")
+interval_ms = st.sidebar.selectbox(
+    "Refresh interval (ms)", [5000, 15000, 30000], index=2, key="home_refresh_interval"
+)
+st_autorefresh(interval=interval_ms, key="data_refresh")
 
 # Sidebar & theme
 render_sidebar()
@@ -37,27 +53,16 @@ st.markdown(get_theme_css(theme), unsafe_allow_html=True)
 st.markdown("<h1 class='title'>Real‑Time Weather Data Dashboard</h1>", unsafe_allow_html=True)
 
 # ────────────────────────────────────────────────────────────────────
-# Session‑state initialisation
+# Data fetch — the cards only need two rows (now and ~30 min ago), so
+# a dual-window Flux query replaces pulling the whole history here.
 # ────────────────────────────────────────────────────────────────────
-if "df" not in st.session_state:
-    st.session_state.df = pd.DataFrame()
-    st.session_state.data_fetched = False
-    st.session_state.last_fetch_time = None
-
 client = get_influxdb_client()
-update_df_from_db(client)
+rows = fetch_current_and_prev(client, minutes=30)
+
 
 # ────────────────────────────────────────────────────────────────────
 # Helpers (no anomaly helpers any more)
 # ────────────────────────────────────────────────────────────────────
-def get_data_minutes_ago(df, minutes):
-    if df.empty:
-        return None
-    target_time = df["Timestamp"].iloc[-1] - pd.Timedelta(minutes=minutes)
-    data = df[df["Timestamp"] <= target_time]
-    return data.iloc[-1] if not data.empty else None
-
-
 def determine_delta_class(delta_value):
     if delta_value is None:
         return "metric-delta-neutral"
@@ -68,16 +73,38 @@ def determine_delta_class(delta_value):
     return "metric-delta-neutral"
 
 
+def metric_card(label, value_text, delta, delta_text, description):
+    return _CARD_TMPL.substitute(
+        label=label,
+        value=value_text,
+        delta_class=determine_delta_class(delta),
+        delta=delta_text if delta is not None else "N/A",
+        description=description,
+    )
+
+
 # ────────────────────────────────────────────────────────────────────
 # Main display
 # ────────────────────────────────────────────────────────────────────
-if st.session_state.data_fetched and not st.session_state.df.empty:
-    df = st.session_state.df
-    latest_data = df.iloc[-1]
-    data_30_min_ago = get_data_minutes_ago(df, 30)
+if rows is not None and not rows.empty:
+    # Both rows become plain dicts of unboxed scalars, so the six delta
+    # subtractions below are raw float ops rather than Series label
+    # lookups plus nan-aware dispatch.
+    latest_data = get_latest_row(rows)
+    data_30_min_ago = get_latest_row(rows.iloc[:1]) if len(rows) > 1 else None
 
     iaq_current = calculate_iaq(latest_data["AQI_avg"], latest_data["humidity_avg"])
 
+    # Compute each derived quantity once per refresh; the metric cards
+    # below only read these locals.
+    uv_index_now = calculate_uv_index(latest_data["uv_data_avg"])
+    dew_point_now = calculate_dew_point(
+        latest_data["temperature_avg"], latest_data["humidity_avg"]
+    )
+    heat_index_now = calculate_heat_index(
+        latest_data["temperature_avg"], latest_data["humidity_avg"]
+    )
+
     if data_30_min_ago is not None:
         temp_delta = latest_data["temperature_avg"] - data_30_min_ago["temperature_avg"]
         humidity_delta = latest_data["humidity_avg"] - data_30_min_ago["humidity_avg"]
@@ -85,176 +112,86 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
         iaq_delta = iaq_current - calculate_iaq(
             data_30_min_ago["AQI_avg"], data_30_min_ago["humidity_avg"]
         )
-        uv_index = calculate_uv_index(latest_data["uv_data_avg"])
-        uv_index_delta = uv_index - calculate_uv_index(data_30_min_ago["uv_data_avg"])
+        uv_index_delta = uv_index_now - calculate_uv_index(data_30_min_ago["uv_data_avg"])
         light_delta = latest_data["ambient_light_avg"] - data_30_min_ago["ambient_light_avg"]
+        dew_point_delta = dew_point_now - calculate_dew_point(
+            data_30_min_ago["temperature_avg"], data_30_min_ago["humidity_avg"]
+        )
+        heat_index_delta = heat_index_now - calculate_heat_index(
+            data_30_min_ago["temperature_avg"], data_30_min_ago["humidity_avg"]
+        )
     else:
         temp_delta = humidity_delta = pressure_delta = iaq_delta = uv_index_delta = light_delta = None
+        dew_point_delta = heat_index_delta = None
 
     st.subheader("Latest Sensor Readings")
 
-    # 1) Temperature & Humidity
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown(
-            f"""
-            <div class="metric-container">
-                <div class="metric-label">Temperature</div>
-                <div class="metric-value">{latest_data['temperature_avg']:.2f} °C</div>
-                <div class="{determine_delta_class(temp_delta)}">
-                    Change: {f"{temp_delta:+.2f} °C" if temp_delta is not None else "N/A"}
-                </div>
-                <div class="metric-description">
-                    {temperature_description(latest_data['temperature_avg'])}
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-    with col2:
-        st.markdown(
-            f"""
-            <div class="metric-container">
-                <div class="metric-label">Humidity</div>
-                <div class="metric-value">{latest_data['humidity_avg']:.2f} %</div>
-                <div class="{determine_delta_class(humidity_delta)}">
-                    Change: {f"{humidity_delta:+.2f} %" if humidity_delta is not None else "N/A"}
-                </div>
-                <div class="metric-description">
-                    {humidity_description(latest_data['humidity_avg'])}
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-    # 2) Pressure & IAQ
-    col3, col4 = st.columns(2)
-    with col3:
-        st.markdown(
-            f"""
-            <div class="metric-container">
-                <div class="metric-label">Pressure</div>
-                <div class="metric-value">{latest_data['pressure_avg']:.2f} hPa</div>
-                <div class="{determine_delta_class(pressure_delta)}">
-                    Change: {f"{pressure_delta:+.2f} hPa" if pressure_delta is not None else "N/A"}
-                </div>
-                <div class="metric-description">
-                    {pressure_description(latest_data['pressure_avg'])}
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-    with col4:
-        st.markdown(
-            f"""
-            <div class="metric-container">
-                <div class="metric-label">Indoor Air Quality (IAQ)</div>
-                <div class="metric-value">{iaq_current:.2f}</div>
-                <div class="{determine_delta_class(iaq_delta)}">
-                    Change: {f"{iaq_delta:+.2f}" if iaq_delta is not None else "N/A"}
-                </div>
-                <div class="metric-description">
-                    {aqi_description(iaq_current)}
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-    # 3) UV Index & Ambient Light
-    col5, col6 = st.columns(2)
-    with col5:
-        uv_index_now = calculate_uv_index(latest_data["uv_data_avg"])
-        st.markdown(
-            f"""
-            <div class="metric-container">
-                <div class="metric-label">UV Index</div>
-                <div class="metric-value">{uv_index_now:.2f}</div>
-                <div class="{determine_delta_class(uv_index_delta)}">
-                    Change: {f"{uv_index_delta:+.2f}" if uv_index_delta is not None else "N/A"}
-                </div>
-                <div class="metric-description">
-                    {uv_description(uv_index_now)}
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-    with col6:
-        st.markdown(
-            f"""
-            <div class="metric-container">
-                <div class="metric-label">Ambient Light</div>
-                <div class="metric-value">{latest_data['ambient_light_avg']:.2f} lux</div>
-                <div class="{determine_delta_class(light_delta)}">
-                    Change: {f"{light_delta:+.2f} lux" if light_delta is not None else "N/A"}
-                </div>
-                <div class="metric-description">
-                    {ambient_light_description(latest_data['ambient_light_avg'])}
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-    # 4) Dew Point & Heat Index
-    col7, col8 = st.columns(2)
-    with col7:
-        dew_point_now = calculate_dew_point(
-            latest_data["temperature_avg"], latest_data["humidity_avg"]
-        )
-        dew_point_delta = (
-            dew_point_now
-            - calculate_dew_point(
-                data_30_min_ago["temperature_avg"], data_30_min_ago["humidity_avg"]
-            )
-            if data_30_min_ago is not None
-            else None
-        )
-        st.markdown(
-            f"""
-            <div class="metric-container">
-                <div class="metric-label">Dew Point</div>
-                <div class="metric-value">{dew_point_now:.2f} °C</div>
-                <div class="{determine_delta_class(dew_point_delta)}">
-                    Change: {f"{dew_point_delta:+.2f} °C" if dew_point_delta is not None else "N/A"}
-                </div>
-                <div class="metric-description">
-                    {dew_point_description(dew_point_now)}
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-    with col8:
-        heat_index_now = calculate_heat_index(
-            latest_data["temperature_avg"], latest_data["humidity_avg"]
-        )
-        heat_index_delta = (
-            heat_index_now
-            - calculate_heat_index(
-                data_30_min_ago["temperature_avg"], data_30_min_ago["humidity_avg"]
-            )
-            if data_30_min_ago is not None
-            else None
-        )
-        st.markdown(
-            f"""
-            <div class="metric-container">
-                <div class="metric-label">Heat Index</div>
-                <div class="metric-value">{heat_index_now:.2f} °C</div>
-                <div class="{determine_delta_class(heat_index_delta)}">
-                    Change: {f"{heat_index_delta:+.2f} °C" if heat_index_delta is not None else "N/A"}
-                </div>
-                <div class="metric-description">
-                    {heat_index_description(heat_index_now)}
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+    # One grid block and a single st.markdown call: eight separate calls
+    # meant eight websocket delta messages to the frontend per refresh.
+    cards = [
+        metric_card(
+            "Temperature",
+            f"{latest_data['temperature_avg']:.2f} °C",
+            temp_delta,
+            f"{temp_delta:+.2f} °C" if temp_delta is not None else None,
+            temperature_description(latest_data["temperature_avg"]),
+        ),
+        metric_card(
+            "Humidity",
+            f"{latest_data['humidity_avg']:.2f} %",
+            humidity_delta,
+            f"{humidity_delta:+.2f} %" if humidity_delta is not None else None,
+            humidity_description(latest_data["humidity_avg"]),
+        ),
+        metric_card(
+            "Pressure",
+            f"{latest_data['pressure_avg']:.2f} hPa",
+            pressure_delta,
+            f"{pressure_delta:+.2f} hPa" if pressure_delta is not None else None,
+            pressure_description(latest_data["pressure_avg"]),
+        ),
+        metric_card(
+            "Indoor Air Quality (IAQ)",
+            f"{iaq_current:.2f}",
+            iaq_delta,
+            f"{iaq_delta:+.2f}" if iaq_delta is not None else None,
+            aqi_description(iaq_current),
+        ),
+        metric_card(
+            "UV Index",
+            f"{uv_index_now:.2f}",
+            uv_index_delta,
+            f"{uv_index_delta:+.2f}" if uv_index_delta is not None else None,
+            uv_description(uv_index_now),
+        ),
+        metric_card(
+            "Ambient Light",
+            f"{latest_data['ambient_light_avg']:.2f} lux",
+            light_delta,
+            f"{light_delta:+.2f} lux" if light_delta is not None else None,
+            ambient_light_description(latest_data["ambient_light_avg"]),
+        ),
+        metric_card(
+            "Dew Point",
+            f"{dew_point_now:.2f} °C",
+            dew_point_delta,
+            f"{dew_point_delta:+.2f} °C" if dew_point_delta is not None else None,
+            dew_point_description(dew_point_now),
+        ),
+        metric_card(
+            "Heat Index",
+            f"{heat_index_now:.2f} °C",
+            heat_index_delta,
+            f"{heat_index_delta:+.2f} °C" if heat_index_delta is not None else None,
+            heat_index_description(heat_index_now),
+        ),
+    ]
+    st.markdown(
+        '<div style="display:grid;grid-template-columns:1fr 1fr;gap:1rem;">'
+        + "".join(cards)
+        + "</div>",
+        unsafe_allow_html=True,
+    )
 
     st.write(f"**Timestamp:** {latest_data['Timestamp']}")
 else:
@@ -1,10 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from utils.data_processing_influx import get_influxdb_client, update_df_from_db, get_theme_css
+from utils.data_processing_influx import (
+    get_influxdb_client,
+    update_df_from_db,
+    downsample_for_plot,
+    count_events,
+    get_theme_css,
+)
 from utils.sidebar import render_sidebar
 from streamlit_autorefresh import st_autorefresh
-import plotly.express as px
+from plotly.subplots import make_subplots
 
 # ---------------------------
 # Page Config & Refresh
@@ -48,16 +54,22 @@ update_df_from_db(client)
 # Helpers
 # ---------------------------
 def get_data_minutes_ago(df, minutes=30):
-    cutoff = df['Timestamp'].iloc[-1] - pd.Timedelta(minutes=minutes)
-    older = df[df['Timestamp'] <= cutoff]
-    return older.iloc[-1] if not older.empty else None
+    # Timestamp is sorted, so a binary search replaces the O(N) mask
+    ts = df['Timestamp'].values
+    cutoff = ts[-1] - np.timedelta64(minutes * 60, 's')
+    i = np.searchsorted(ts, cutoff, side='right') - 1
+    return df.iloc[i] if i >= 0 else None
 
 def anomaly_count(df, col, minutes):
-    cutoff = df['Timestamp'].iloc[-1] - pd.Timedelta(minutes=minutes)
-    return int(df[df['Timestamp'] >= cutoff][col].sum()) if col in df.columns else 0
+    return count_events(df, col, minutes)
 
 def total_and_rate(df, col):
-    total = int(df[col].sum()) if col in df.columns else 0
+    # the ingest-side running totals avoid a fresh column sum per rerun
+    cumsum = st.session_state.get('anom_cumsum', {}).get(col)
+    if cumsum is not None and len(cumsum):
+        total = int(cumsum[-1])
+    else:
+        total = int(df[col].sum()) if col in df.columns else 0
     hours = max((df['Timestamp'].iloc[-1] - df['Timestamp'].iloc[0]).total_seconds()/3600, 1)
     rate = total / hours * 24
     return total, rate
@@ -66,8 +78,12 @@ def total_and_rate(df, col):
 # Main
 # ---------------------------
 if st.session_state.data_fetched and not st.session_state.df.empty:
-    df = st.session_state.df.copy()
-    df.dropna(subset=['temperature_avg','humidity_avg','pressure_avg'], inplace=True)
+    df = st.session_state.df
+    # filter NaN rows without copying the whole frame first; most of the
+    # time the mask is all-True and the slice is skipped entirely
+    valid = df[['temperature_avg','humidity_avg','pressure_avg']].notna().all(axis=1).values
+    if not valid.all():
+        df = df.loc[valid]
     latest = df.iloc[-1]
     past30 = get_data_minutes_ago(df, 30)
 
@@ -84,22 +100,22 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
     # ---------------------------
     # Metric Cards
     # ---------------------------
+    # classify and format the three deltas in one vectorized pass
+    units = ["°C", "%", "hPa"]
+    deltas = np.array([np.nan if d is None else d
+                       for d in (temp_delta, hum_delta, pres_delta)])
+    d_classes = np.array(["metric-delta-negative", "metric-delta-neutral",
+                          "metric-delta-positive"])[(np.sign(np.nan_to_num(deltas)) + 1).astype(int)]
+    d_texts = [f"{d:+.2f} {u}" if np.isfinite(d) else "N/A"
+               for d, u in zip(deltas, units)]
+
     col1, col2, col3 = st.columns(3)
-    for box, label, col_avg, delta, unit, cnt2, rate in [
-        (col1, "Temperature", "temperature_avg", temp_delta, "°C", cnt2_t, rate_t),
-        (col2, "Humidity",    "humidity_avg",    hum_delta,    "%",  cnt2_h, rate_h),
-        (col3, "Pressure",    "pressure_avg",    pres_delta,   "hPa",cnt2_p, rate_p),
-    ]:
-        # choose delta class & text
-        if delta is None:
-            d_cls, d_txt = "metric-delta-neutral", "N/A"
-        else:
-            d_txt = f"{delta:+.2f} {unit}"
-            d_cls = ("metric-delta-positive"
-                     if delta>0 else
-                     "metric-delta-negative"
-                     if delta<0 else
-                     "metric-delta-neutral")
+    for i, (box, label, col_avg, cnt2, rate) in enumerate([
+        (col1, "Temperature", "temperature_avg", cnt2_t, rate_t),
+        (col2, "Humidity",    "humidity_avg",    cnt2_h, rate_h),
+        (col3, "Pressure",    "pressure_avg",    cnt2_p, rate_p),
+    ]):
+        unit, d_txt, d_cls = units[i], d_texts[i], d_classes[i]
 
         box.markdown(f"""
         <div class="metric-container">
@@ -122,45 +138,61 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
         show_anoms = st.checkbox("Show anomaly markers", value=True)
 
     # ---------------------------
-    # Individual Graphs
+    # Combined Graph (one figure, three stacked subplots)
     # ---------------------------
-    for title, ycol, color, ancol in [
-        ("Temperature Over Time", "temperature_avg", "red",   "temperature_anomaly"),
-        ("Humidity Over Time",    "humidity_avg",    "blue",  "humidity_anomaly"),
-        ("Pressure Over Time",    "pressure_avg",    "green", "pressure_anomaly"),
-    ]:
-        st.markdown(f"#### {title}")
-        fig = px.line(df, x='Timestamp', y=ycol, color_discrete_sequence=[color])
-        fig.update_traces(mode='lines', name=title)
-
-        if show_anoms and ancol in df.columns:
-            ev = df[df[ancol]==1]
-            if not ev.empty:
-                fig.add_scatter(
-                    x=ev['Timestamp'],
-                    y=ev[ycol],
-                    mode='markers',
-                    name="Anomaly",
-                    marker=dict(color='orange', size=8, symbol='x', opacity=0.7),
-                    yaxis="y"
-                )
-
+    # One figure means one JSON payload, one websocket frame and one
+    # plotly.js mount instead of three. Lines are WebGL-rendered and
+    # LTTB-downsampled; sparse anomaly markers stay at full resolution.
+    st.markdown("#### Temperature, Humidity & Pressure Over Time")
+    # Rebuild the figure only when the data, toggle or theme changed;
+    # autorefresh reruns in between reuse the cached figure object.
+    fig_ver = (len(df), int(df['Timestamp'].iloc[-1].value), show_anoms, theme)
+    if st.session_state.get('wm_fig_ver') == fig_ver:
+        fig = st.session_state['wm_fig']
+    else:
+        fig = make_subplots(
+            rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.06,
+            subplot_titles=("Temperature", "Humidity", "Pressure"),
+        )
+        for row, (label, ycol, color, ancol) in enumerate([
+            ("Temperature", "temperature_avg", "red",   "temperature_anomaly"),
+            ("Humidity",    "humidity_avg",    "blue",  "humidity_anomaly"),
+            ("Pressure",    "pressure_avg",    "green", "pressure_anomaly"),
+        ], start=1):
+            plot_df = downsample_for_plot(df, ycol)
+            fig.add_scattergl(
+                x=plot_df['Timestamp'], y=plot_df[ycol],
+                mode='lines', name=label, line=dict(color=color),
+                row=row, col=1,
+            )
+            if show_anoms and ancol in df.columns:
+                # anomaly row positions are precomputed on ingest against
+                # the full session frame; they only apply here when the
+                # NaN filter above dropped nothing, otherwise fall back
+                # to the boolean scan (same length guard count_events
+                # uses for its cached cumsum)
+                anom_idx = st.session_state.get('anom_idx', {})
+                if ancol in anom_idx and len(df) == len(st.session_state.df):
+                    ev = df.iloc[anom_idx[ancol]]
+                else:
+                    ev = df[df[ancol]==1]
+                if not ev.empty:
+                    fig.add_scattergl(
+                        x=ev['Timestamp'],
+                        y=ev[ycol],
+                        mode='markers',
+                        name=f"{label} Anomaly",
+                        marker=dict(color='orange', size=8, symbol='x', opacity=0.7),
+                        row=row, col=1,
+                    )
+
+        fig.update_xaxes(linecolor=axis_color, tickfont=dict(color=axis_color),
+                         showgrid=False, tickformat="%H:%M")
+        fig.update_yaxes(linecolor=axis_color, tickfont=dict(color=axis_color),
+                         showgrid=False)
+        fig.update_xaxes(title_text="Time", row=3, col=1)
         fig.update_layout(
-            xaxis=dict(
-                title="Time",
-                linecolor=axis_color,
-                tickfont=dict(color=axis_color),
-                titlefont=dict(color=axis_color),
-                showgrid=False,
-                tickformat="%H:%M"
-            ),
-            yaxis=dict(
-                title=title.split()[0],
-                linecolor=axis_color,
-                tickfont=dict(color=axis_color),
-                titlefont=dict(color=axis_color),
-                showgrid=False
-            ),
+            height=900,
             plot_bgcolor=bgcolor,
             paper_bgcolor=bgcolor,
             font=dict(color=axis_color),
@@ -173,7 +205,10 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
                 x=1
             )
         )
-        st.plotly_chart(fig, use_container_width=True)
+        st.session_state['wm_fig'] = fig
+        st.session_state['wm_fig_ver'] = fig_ver
+
+    st.plotly_chart(fig, use_container_width=True)
 
 else:
     st.warning("No data available yet.")
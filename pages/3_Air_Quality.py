@@ -5,6 +5,7 @@ from utils.data_processing_influx import (
     get_influxdb_client,
     update_df_from_db,
     update_iaq_values,
+    downsample_for_plot,
     get_theme_css
 )
 from utils.sidebar import render_sidebar
@@ -43,12 +44,10 @@ client = get_influxdb_client()
 update_df_from_db(client)
 
 if st.session_state.data_fetched and not st.session_state.df.empty:
-    # Work on a copy of the DataFrame
+    # Work on a copy of the DataFrame (this page renames/mutates columns).
+    # Ingest already stores Timestamp as sorted datetime64, so no
+    # re-parse or re-sort is needed here.
     df = st.session_state.df.copy()
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-    
-    # Sort by Timestamp and reset index (to align with our stored IAQ values)
-    df = df.sort_values('Timestamp').reset_index(drop=True)
     
     # -------------------------------------------
     # Use Aggregated Columns
@@ -142,13 +141,19 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
         value=(min_time.to_pydatetime(), max_time.to_pydatetime()),
         format="YYYY-MM-DD HH:mm"
     )
-    mask = (df_clean['Timestamp'] >= time_range[0]) & (df_clean['Timestamp'] <= time_range[1])
-    df_filtered = df_clean.loc[mask]
+    # Timestamp is sorted, so the slider window is a contiguous slice;
+    # two binary searches replace the full-column boolean mask per tick
+    ts = df_clean['Timestamp']
+    lo = ts.searchsorted(time_range[0], side='left')
+    hi = ts.searchsorted(time_range[1], side='right')
+    df_filtered = df_clean.iloc[lo:hi]
     
     if df_filtered.empty:
         st.warning("No data available for the selected time range.")
     else:
-        fig_iaq = px.line(df_filtered, x='Timestamp', y='IAQ', color_discrete_sequence=['cyan'])
+        fig_iaq = px.line(downsample_for_plot(df_filtered, 'IAQ'),
+                          x='Timestamp', y='IAQ', color_discrete_sequence=['cyan'],
+                          render_mode='webgl')
         fig_iaq.update_layout(
             xaxis_title='Time',
             yaxis_title='IAQ',
@@ -176,7 +181,9 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
     if df_filtered.empty:
         st.warning("No data available for the selected time range.")
     else:
-        fig_gas = px.line(df_filtered, x='Timestamp', y='gas_resistance', color_discrete_sequence=['magenta'])
+        fig_gas = px.line(downsample_for_plot(df_filtered, 'gas_resistance'),
+                          x='Timestamp', y='gas_resistance', color_discrete_sequence=['magenta'],
+                          render_mode='webgl')
         fig_gas.update_layout(
             xaxis_title='Time',
             yaxis_title='Gas Resistance (Ω)',
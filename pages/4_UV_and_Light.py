@@ -6,10 +6,14 @@ from utils.data_processing_influx import (
     update_df_from_db,
     calculate_uv_index,
     uv_description,
+    fetch_event_stats,
+    count_events,
+    downsample_for_plot,
     get_theme_css
 )
 from utils.sidebar import render_sidebar
 from streamlit_autorefresh import st_autorefresh
+from scipy.ndimage import median_filter
 
 # ---------------------------
 # Page Config & Auto-Refresh
@@ -21,12 +25,9 @@ st.set_page_config(
 )
 st_autorefresh(interval=30000, key="uv_light_refresh")  # refresh every 30s now
 
-render_sidebar()
-theme = st.session_state.get("theme", "Dark")
-st.markdown(get_theme_css(theme), unsafe_allow_html=True)
-
-# Style the checkbox like a button
-st.markdown("""
+# Checkbox/button styling and event-summary text; module-level constant
+# appended to the cached theme CSS in a single markdown element.
+_PAGE_CSS = """
 <style>
 div[data-baseweb="checkbox"] {
     padding: 0.5em 0.75em;
@@ -54,7 +55,30 @@ div[data-baseweb="checkbox"] input:checked + label {
     color: inherit;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Shared chart layout per theme, built once at import so each figure
+# rebuild skips re-constructing (and re-validating) the same dicts.
+_CHART_LAYOUT = {
+    "Light": dict(
+        plot_bgcolor="rgb(240,240,240)", paper_bgcolor="rgb(240,240,240)",
+        font=dict(color="black"),
+        xaxis=dict(tickformat="%H:%M", linecolor="#000", tickfont=dict(color="black")),
+        yaxis=dict(linecolor="#000", tickfont=dict(color="black")),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    ),
+    "Dark": dict(
+        plot_bgcolor="rgb(17,17,17)", paper_bgcolor="rgb(17,17,17)",
+        font=dict(color="white"),
+        xaxis=dict(tickformat="%H:%M", linecolor="#FFF", tickfont=dict(color="white")),
+        yaxis=dict(linecolor="#FFF", tickfont=dict(color="white")),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    ),
+}
+
+render_sidebar()
+theme = st.session_state.get("theme", "Dark")
+st.markdown(get_theme_css(theme) + _PAGE_CSS, unsafe_allow_html=True)
 
 # ---------------------------
 # Title & Data Fetch
@@ -72,58 +96,66 @@ update_df_from_db(client)
 # Helper: count recent events & get durations
 # ---------------------------
 def count_recent(df, col, minutes=30):
-    if df.empty or col not in df.columns:
-        return 0
-    cutoff = df['Timestamp'].iloc[-1] - pd.Timedelta(minutes=minutes)
-    return int(df[df['Timestamp'] >= cutoff][col].sum())
+    # binary search + contiguous slice sum in the shared helper
+    return count_events(df, col, minutes)
+
+def on_runs(values, threshold):
+    """Start/end row indices of contiguous runs where values >= threshold.
+
+    One diff over the 0/1 mask finds every run boundary; even edges are
+    run starts, odd edges are one past the run ends. Replaces the old
+    mask/cumsum/groupby pattern, which built a DataFrame per run.
+    """
+    m = (values >= threshold).astype(np.int8)
+    edges = np.flatnonzero(np.diff(m, prepend=0, append=0))
+    return edges[0::2], edges[1::2] - 1
+
+def merge_runs(starts, ends, ts_ns, max_bands=2000):
+    """Merge runs separated by less than ~one pixel's worth of time.
+
+    Dense on/off flapping otherwise emits hundreds of sub-pixel rects
+    and marker pairs into the figure JSON for no visible difference.
+    """
+    if len(starts) <= 1:
+        return starts, ends
+    min_gap = (ts_ns[-1] - ts_ns[0]) // max_bands
+    keep = ts_ns[starts[1:]] - ts_ns[ends[:-1]] >= min_gap
+    merged_starts = np.concatenate(([starts[0]], starts[1:][keep]))
+    merged_ends = np.concatenate((ends[:-1][keep], [ends[-1]]))
+    return merged_starts, merged_ends
 
 def get_event_stats(df, column, threshold):
     if df.empty or column not in df.columns:
         return {"durations": [], "last_time": None}
-    
-    # Create a mask for the condition (e.g., light on, sunlight exposure)
-    mask = df[column] >= threshold
-    
-    # Find when state changes (on->off or off->on)
-    state_changes = mask != mask.shift(1)
-    runs = state_changes.cumsum()
-    
+
+    starts, ends = on_runs(df[column].to_numpy(), threshold)
+
+    # Keep only runs starting today, compared as int64 nanoseconds so no
+    # per-run Timestamp objects or tzinfo branching are involved.
+    if len(starts):
+        ts_ns = df['Timestamp'].values.view('i8')
+        today_ns = pd.Timestamp.now(tz=df['Timestamp'].dt.tz).floor('D').value
+        m = ts_ns[starts] >= today_ns
+        starts, ends = starts[m], ends[m]
+
+    ts = df['Timestamp']
     durations = []
-    last_time = None
-    
-    # Group by runs to find contiguous periods
-    for _, grp in df.groupby(runs):
-        if grp[column].iloc[0] >= threshold:  # Only consider "on" periods
-            start_time = grp['Timestamp'].iloc[0]
-            end_time = grp['Timestamp'].iloc[-1]
-            duration_mins = (end_time - start_time).total_seconds() / 60
-            durations.append({"start": start_time, "end": end_time, "duration": duration_mins})
-    
-    # Get today's events - make sure to use timezone-aware or both naive
-    if durations:
-        # Get timezone-naive representation of today's start
-        today = pd.Timestamp.now().floor('D')
-        
-        # If our timestamps are timezone-aware, make today timezone-aware too
-        if durations[0]["start"].tzinfo is not None:
-            today = today.tz_localize(durations[0]["start"].tzinfo)
-            
-        today_events = [d for d in durations if d["start"] >= today]
-    else:
-        today_events = []
-    
-    # Find the last event time
-    if today_events:
-        last_time = today_events[-1]["end"]
-    
-    return {"durations": today_events, "last_time": last_time}
+    for s, e in zip(starts, ends):
+        start_time = ts.iloc[int(s)]
+        end_time = ts.iloc[int(e)]
+        duration_mins = (end_time - start_time).total_seconds() / 60
+        durations.append({"start": start_time, "end": end_time, "duration": duration_mins})
+
+    last_time = durations[-1]["end"] if durations else None
+    return {"durations": durations, "last_time": last_time}
 
 # ---------------------------
 # Main
 # ---------------------------
 if st.session_state.data_fetched and not st.session_state.df.empty:
+    # Work on a copy (this page renames/mutates columns). Ingest already
+    # stores Timestamp as sorted tz-aware datetime64, so no re-parse.
     df = st.session_state.df.copy()
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
 
     # Rename for simplicity
     rename_map = {
@@ -136,26 +168,28 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
 
     # Clean & derive
     df = df.dropna(subset=['uv_data','ambient_light'])
-    df['UV_Index'] = df['uv_data'].apply(calculate_uv_index)
+    # calculate_uv_index is pure arithmetic, so passing the whole array
+    # through it beats a per-row .apply dispatch
+    df['UV_Index'] = calculate_uv_index(df['uv_data'].to_numpy())
     latest = df.iloc[-1]
 
-    # Get event statistics - ensure we're using the same threshold for both UV graph and metrics
-    light_stats = get_event_stats(df, 'ambient_light', 20)
-    
+    # Smooth once on the full frame; the slider slice below reuses this
+    # column, so the event bands never re-run the median. scipy's
+    # median_filter is a centered C-loop rolling median without the
+    # per-window pandas dispatch.
+    df['uv_smooth'] = median_filter(df['uv_data'].to_numpy(),
+                                    size=21, mode='nearest')
+
+    # Light-on stats are aggregated server-side by InfluxDB; only the
+    # on-time total and last-on timestamp cross the wire. Sunlight stays
+    # client-side because its threshold applies to the smoothed series.
+    light_stats = fetch_event_stats(client, 'ambient_light_avg', 20)
+
     # IMPORTANT: Use the same threshold (0.85) for UV metrics as used in the graph bands
-    sun_stats = get_event_stats(df, 'uv_smooth', 0.85)  
-    
-    # If we don't have uv_smooth in the main dataframe yet, calculate it
-    if 'uv_smooth' not in df.columns:
-        df['uv_smooth'] = (
-            df['uv_data']
-               .rolling(window=21, center=True, min_periods=1)
-               .median()
-        )
-        sun_stats = get_event_stats(df, 'uv_smooth', 0.85)
-    
+    sun_stats = get_event_stats(df, 'uv_smooth', 0.85)
+
     # Format durations for display with safer default values
-    light_duration = sum(e["duration"] for e in light_stats["durations"]) if light_stats["durations"] else 0
+    light_duration = light_stats["on_minutes"]
     sun_duration = sum(e["duration"] for e in sun_stats["durations"]) if sun_stats["durations"] else 0
     
     # Convert durations to hours and minutes format
@@ -172,16 +206,8 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
     shade_duration_formatted = format_duration(24*60 - sun_duration)
     light_off_duration_formatted = format_duration(24*60 - light_duration)
     
-    light_count = len(light_stats["durations"])
     sun_count = len(sun_stats["durations"])
-    
-    # Check for events from today
-    today = pd.Timestamp.now().floor('D')
-    
-    # Get timezone from DataFrame if available
-    if not df.empty and hasattr(df['Timestamp'].iloc[0], 'tzinfo') and df['Timestamp'].iloc[0].tzinfo:
-        today = today.tz_localize(df['Timestamp'].iloc[0].tzinfo)
-    
+
     # For the last time of UV events, use the same detection logic as the graph
     last_sun_time = sun_stats["last_time"].strftime("%H:%M") if sun_stats["last_time"] else "N/A"
     last_light_time = light_stats["last_time"].strftime("%H:%M") if light_stats["last_time"] else "N/A"
@@ -238,94 +264,103 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
     mask = (df['Timestamp'] >= start) & (df['Timestamp'] <= end)
     dff = df.loc[mask]
 
+    # Rebuild the two figures (and their event bands) only when the
+    # window, toggle or theme changed; reruns in between reuse them.
+    fig_ver = (len(dff),
+               int(dff['Timestamp'].iloc[-1].value) if len(dff) else 0,
+               show_events, theme)
+    reuse_figs = st.session_state.get('uvl_fig_ver') == fig_ver
+
     # Prepare shading intervals and markers if asked
     uv_bands = []
     light_bands = []
     uv_markers = []
     light_markers = []
-    
-    if show_events and not dff.empty:
-        # UV smoothing & mask
-        dff['uv_smooth'] = (
-            dff['uv_data']
-               .rolling(window=21, center=True, min_periods=1)
-               .median()
-        )
-        uv_mask = dff['uv_smooth'] >= 0.85
-        # find contiguous runs
-        runs = (uv_mask != uv_mask.shift(1)).cumsum()
-        for _, grp in dff.groupby(runs):
-            if grp['uv_smooth'].iloc[0] >= 0.85:
-                uv_bands.append({
-                  "type":"rect",
-                  "xref":"x","yref":"paper",
-                  "x0":grp['Timestamp'].iloc[0],
-                  "x1":grp['Timestamp'].iloc[-1],
-                  "y0":0,"y1":1,
-                  "fillcolor":"rgba(255,165,0,0.2)",
-                  "line_width":0
-                })
-                # Add start marker (sun symbol)
-                uv_markers.append({
-                    "x": grp['Timestamp'].iloc[0],
-                    "y": grp['UV_Index'].iloc[0],
-                    "text": "☀️",
-                    "showarrow": False,
-                    "font": {"size": 16}
-                })
-                # Add end marker (moon symbol)
-                uv_markers.append({
-                    "x": grp['Timestamp'].iloc[-1],
-                    "y": grp['UV_Index'].iloc[-1],
-                    "text": "🌙",
-                    "showarrow": False,
-                    "font": {"size": 16}
-                })
-
-        # Ambient light mask
-        light_mask = dff['ambient_light'] >= 20
-        runs2 = (light_mask != light_mask.shift(1)).cumsum()
-        for _, grp in dff.groupby(runs2):
-            if grp['ambient_light'].iloc[0] >= 20:
-                light_bands.append({
-                  "type":"rect",
-                  "xref":"x","yref":"paper",
-                  "x0":grp['Timestamp'].iloc[0],
-                  "x1":grp['Timestamp'].iloc[-1],
-                  "y0":0,"y1":1,
-                  "fillcolor":"rgba(0,255,255,0.15)",
-                  "line_width":0
-                })
-                # Add start marker (torch/light on)
-                light_markers.append({
-                    "x": grp['Timestamp'].iloc[0],
-                    "y": grp['ambient_light'].iloc[0],
-                    "text": "🔦",
-                    "showarrow": False,
-                    "font": {"size": 16}
-                })
-                # Add end marker (light off)
-                light_markers.append({
-                    "x": grp['Timestamp'].iloc[-1],
-                    "y": grp['ambient_light'].iloc[-1],
-                    "text": "🌑",
-                    "showarrow": False,
-                    "font": {"size": 16}
-                })
+
+    if show_events and not dff.empty and not reuse_figs:
+        # uv_smooth was computed on the full frame and sliced with dff
+        ts = dff['Timestamp']
+        ts_ns = ts.values.view('i8')
+
+        # UV exposure runs
+        starts, ends = on_runs(dff['uv_smooth'].to_numpy(), 0.85)
+        starts, ends = merge_runs(starts, ends, ts_ns)
+        uvi = dff['UV_Index']
+        for s, e in zip(starts, ends):
+            t0, t1 = ts.iloc[int(s)], ts.iloc[int(e)]
+            uv_bands.append({
+              "type":"rect",
+              "xref":"x","yref":"paper",
+              "x0":t0,
+              "x1":t1,
+              "y0":0,"y1":1,
+              "fillcolor":"rgba(255,165,0,0.2)",
+              "line_width":0
+            })
+            # Start marker (sun symbol)
+            uv_markers.append({
+                "x": t0,
+                "y": uvi.iloc[int(s)],
+                "text": "☀️",
+                "showarrow": False,
+                "font": {"size": 16}
+            })
+            # End marker (moon symbol)
+            uv_markers.append({
+                "x": t1,
+                "y": uvi.iloc[int(e)],
+                "text": "🌙",
+                "showarrow": False,
+                "font": {"size": 16}
+            })
+
+        # Ambient light runs
+        light = dff['ambient_light']
+        starts, ends = on_runs(light.to_numpy(), 20)
+        starts, ends = merge_runs(starts, ends, ts_ns)
+        for s, e in zip(starts, ends):
+            t0, t1 = ts.iloc[int(s)], ts.iloc[int(e)]
+            light_bands.append({
+              "type":"rect",
+              "xref":"x","yref":"paper",
+              "x0":t0,
+              "x1":t1,
+              "y0":0,"y1":1,
+              "fillcolor":"rgba(0,255,255,0.15)",
+              "line_width":0
+            })
+            # Start marker (torch/light on)
+            light_markers.append({
+                "x": t0,
+                "y": light.iloc[int(s)],
+                "text": "🔦",
+                "showarrow": False,
+                "font": {"size": 16}
+            })
+            # End marker (light off)
+            light_markers.append({
+                "x": t1,
+                "y": light.iloc[int(e)],
+                "text": "🌑",
+                "showarrow": False,
+                "font": {"size": 16}
+            })
 
     # Draw UV chart
-    import plotly.express as px
     import plotly.graph_objects as go
-    plot_bg = "rgb(240,240,240)" if theme=="Light" else "rgb(17,17,17)"
-    font_c  = "black" if theme=="Light" else "white"
-    axis_c  = "#000" if theme=="Light" else "#FFF"
+    chart_layout = _CHART_LAYOUT.get(theme, _CHART_LAYOUT["Dark"])
 
     st.subheader("UV Index Over Time")
     if dff.empty:
         st.warning("No data in that range.")
+    elif reuse_figs:
+        st.plotly_chart(st.session_state['uv_fig'], use_container_width=True)
     else:
-        fig_uv = px.line(dff, x='Timestamp', y='UV_Index', color_discrete_sequence=['#FFA500'])
-        fig_uv.update_traces(mode='lines', name='UV Index')
+        plot_uv = downsample_for_plot(dff, 'UV_Index')
+        fig_uv = go.Figure(go.Scattergl(
+            x=plot_uv['Timestamp'], y=plot_uv['UV_Index'],
+            mode='lines', line=dict(color='#FFA500'), name='UV Index'
+        ))
         
         # Add custom legend entries for markers
         if show_events:
@@ -348,24 +383,23 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
                 showlegend=True
             ))
         
-        fig_uv.update_layout(
-            xaxis_title='Time',
-            yaxis_title='UV Index',
-            plot_bgcolor=plot_bg, paper_bgcolor=plot_bg,
-            font=dict(color=font_c),
-            xaxis=dict(tickformat='%H:%M', linecolor=axis_c, tickfont=dict(color=font_c)),
-            yaxis=dict(linecolor=axis_c, tickfont=dict(color=font_c)),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
+        fig_uv.update_layout(chart_layout)
+        fig_uv.update_layout(xaxis_title='Time', yaxis_title='UV Index')
+        st.session_state['uv_fig'] = fig_uv
         st.plotly_chart(fig_uv, use_container_width=True)
 
     # Draw Ambient Light chart
     st.subheader("Ambient Light Over Time")
     if dff.empty:
         st.warning("No data in that range.")
+    elif reuse_figs:
+        st.plotly_chart(st.session_state['light_fig'], use_container_width=True)
     else:
-        fig_l = px.line(dff, x='Timestamp', y='ambient_light', color_discrete_sequence=['#00FFFF'])
-        fig_l.update_traces(mode='lines', name='Ambient Light')
+        plot_l = downsample_for_plot(dff, 'ambient_light')
+        fig_l = go.Figure(go.Scattergl(
+            x=plot_l['Timestamp'], y=plot_l['ambient_light'],
+            mode='lines', line=dict(color='#00FFFF'), name='Ambient Light'
+        ))
         
         if show_events:
             fig_l.update_layout(shapes=light_bands)
@@ -387,15 +421,10 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
                 showlegend=True
             ))
         
-        fig_l.update_layout(
-            xaxis_title='Time',
-            yaxis_title='Ambient Light (lux)',
-            plot_bgcolor=plot_bg, paper_bgcolor=plot_bg,
-            font=dict(color=font_c),
-            xaxis=dict(tickformat='%H:%M', linecolor=axis_c, tickfont=dict(color=font_c)),
-            yaxis=dict(linecolor=axis_c, tickfont=dict(color=font_c)),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
+        fig_l.update_layout(chart_layout)
+        fig_l.update_layout(xaxis_title='Time', yaxis_title='Ambient Light (lux)')
+        st.session_state['light_fig'] = fig_l
+        st.session_state['uvl_fig_ver'] = fig_ver
         st.plotly_chart(fig_l, use_container_width=True)
 
     # Health advisory remains unchanged
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from utils.data_processing_influx import (
     get_influxdb_client,
     update_df_from_db,
@@ -60,11 +61,8 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
     # Define the list of metrics using the professional names
     metrics = list(professional_names.values())
 
-    # Ensure the selected metrics are numeric
-    for metric in metrics:
-        df[metric] = pd.to_numeric(df[metric], errors='coerce')
-
-    # Drop rows with NaN values in the selected metrics
+    # Ingest already types these columns as float32, so no per-rerun
+    # to_numeric coercion; just drop rows with missing values.
     df = df.dropna(subset=metrics)
 
     st.markdown("### Select Metrics for Correlation Analysis")
@@ -75,11 +73,21 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
     if len(selected_metrics) < 2:
         st.warning("Please select at least two metrics for correlation analysis.")
     else:
-        # Filter data to selected metrics
-        df_selected = df[selected_metrics]
-
-        # Calculate correlation matrix
-        corr_matrix = df_selected.corr()
+        # Recompute the Pearson matrix only when new rows arrived or the
+        # metric selection changed; reruns in between hit the cache.
+        @st.cache_data(max_entries=8)
+        def compute_corr(_data, data_ver, metrics):
+            # one BLAS call over a contiguous float32 block instead of
+            # pandas' pairwise NaN-safe .corr(); dropna above guarantees
+            # there are no NaNs for corrcoef to mishandle
+            arr = np.ascontiguousarray(
+                _data[list(metrics)].to_numpy(dtype=np.float32).T
+            )
+            return pd.DataFrame(np.corrcoef(arr),
+                                index=list(metrics), columns=list(metrics))
+
+        data_ver = (len(df), df['Timestamp'].iloc[-1].value if len(df) else 0)
+        corr_matrix = compute_corr(df, data_ver, tuple(selected_metrics))
 
         st.markdown("### Correlation Heatmap")
 
@@ -95,48 +103,57 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
             font_color = 'white'
             colorscale = 'Bluered'
 
-        # Generate heatmap using Plotly Express
-        fig = px.imshow(
-            corr_matrix,
-            text_auto=True,
-            aspect="auto",
-            color_continuous_scale=colorscale,
-            color_continuous_midpoint=0,
-        )
-
-        # Update layout for theme and set tick labels as the selected friendly names
-        fig.update_layout(
-            xaxis=dict(
-                tickmode='array',
-                tickvals=list(range(len(selected_metrics))),
-                ticktext=selected_metrics,
-                side='bottom',
-                ticks='outside',
-                tickfont=dict(color=font_color),
-                titlefont=dict(color=font_color),
-                gridcolor='gray',
-                showgrid=False,
-            ),
-            yaxis=dict(
-                tickmode='array',
-                tickvals=list(range(len(selected_metrics))),
-                ticktext=selected_metrics,
-                ticks='outside',
-                tickfont=dict(color=font_color),
-                titlefont=dict(color=font_color),
-                gridcolor='gray',
-                showgrid=False,
-            ),
-            plot_bgcolor=background_color,
-            paper_bgcolor=paper_bgcolor,
-            font=dict(color=font_color),
-            margin=dict(l=100, r=100, t=50, b=50),
-            coloraxis_colorbar=dict(
-                title="Correlation",
-                tickfont=dict(color=font_color),
-                titlefont=dict(color=font_color),
-            ),
-        )
+        # Building the styled heatmap figure is the expensive part of this
+        # page; reuse it across reruns until the data, selection or theme
+        # changes (same pattern as the combined Weather Metrics figure).
+        fig_ver = (data_ver, tuple(selected_metrics), theme)
+        if st.session_state.get('corr_fig_ver') == fig_ver:
+            fig = st.session_state['corr_fig']
+        else:
+            # Generate heatmap using Plotly Express
+            fig = px.imshow(
+                corr_matrix,
+                text_auto=True,
+                aspect="auto",
+                color_continuous_scale=colorscale,
+                color_continuous_midpoint=0,
+            )
+
+            # Update layout for theme and set tick labels as the selected friendly names
+            fig.update_layout(
+                xaxis=dict(
+                    tickmode='array',
+                    tickvals=list(range(len(selected_metrics))),
+                    ticktext=selected_metrics,
+                    side='bottom',
+                    ticks='outside',
+                    tickfont=dict(color=font_color),
+                    titlefont=dict(color=font_color),
+                    gridcolor='gray',
+                    showgrid=False,
+                ),
+                yaxis=dict(
+                    tickmode='array',
+                    tickvals=list(range(len(selected_metrics))),
+                    ticktext=selected_metrics,
+                    ticks='outside',
+                    tickfont=dict(color=font_color),
+                    titlefont=dict(color=font_color),
+                    gridcolor='gray',
+                    showgrid=False,
+                ),
+                plot_bgcolor=background_color,
+                paper_bgcolor=paper_bgcolor,
+                font=dict(color=font_color),
+                margin=dict(l=100, r=100, t=50, b=50),
+                coloraxis_colorbar=dict(
+                    title="Correlation",
+                    tickfont=dict(color=font_color),
+                    titlefont=dict(color=font_color),
+                ),
+            )
+            st.session_state['corr_fig'] = fig
+            st.session_state['corr_fig_ver'] = fig_ver
 
         st.plotly_chart(fig, use_container_width=True)
 else:
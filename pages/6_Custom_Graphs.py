@@ -3,6 +3,7 @@ import pandas as pd
 from utils.data_processing_influx import (
     get_influxdb_client,
     update_df_from_db,
+    downsample_for_plot,
     get_theme_css
 )
 from utils.sidebar import render_sidebar
@@ -16,8 +17,10 @@ st.set_page_config(
     layout="wide",
 )
 
-# Automatic refresh every 5 seconds
-st_autorefresh(interval=5000, key="data_refresh")
+# Automatic refresh every 30 seconds — matches the ingest cadence
+# (one aggregated point per 30 s), so faster polling only produced
+# empty re-queries and full page rerenders.
+st_autorefresh(interval=30000, key="data_refresh")
 
 # Render the sidebar
 render_sidebar()
@@ -39,18 +42,18 @@ if 'df' not in st.session_state:
 # Get InfluxDB client
 client = get_influxdb_client()
 
-# Add manual refresh button
-if st.button("Refresh Data"):
-    update_df_from_db(client)
+# Manual refresh button (forces an immediate rerun, and with it a fetch)
+st.button("Refresh Data")
 
-# Ensure data is updated
-if not st.session_state.data_fetched:
-    update_df_from_db(client)
+# Incremental fetch: only rows past the watermark are pulled, so calling
+# this every rerun is cheap and keeps the page current between clicks.
+update_df_from_db(client)
 
 # Display analysis tools
 if st.session_state.data_fetched and not st.session_state.df.empty:
-    df = st.session_state.df.copy()
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+    # Ingest already stores Timestamp as sorted datetime64 and the
+    # metrics as float32, so no per-rerun re-parse or coercion.
+    df = st.session_state.df
 
     # Define mapping of friendly metric names to aggregated column names
     friendly_to_column = {
@@ -63,15 +66,12 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
         "Ambient Light (lux)": "ambient_light_avg"
     }
 
-    # Ensure data is numeric for the aggregated columns
-    # (Skip "Time")
-    for friendly, col in friendly_to_column.items():
-        if col != "Timestamp":
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-    # Drop rows with NaN values in all metric columns (except Time)
+    # Drop rows with NaN values in all metric columns (except Time);
+    # most reruns the mask is all-True and no copy is made
     metrics_cols = [v for k, v in friendly_to_column.items() if v != "Timestamp"]
-    df = df.dropna(subset=metrics_cols)
+    valid = df[metrics_cols].notna().all(axis=1).values
+    if not valid.all():
+        df = df.loc[valid]
 
     # Add 'Time' as an option for X-axis (already included in friendly_to_column)
     x_axis_options = list(friendly_to_column.keys())
@@ -103,9 +103,12 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
         format="YYYY-MM-DD HH:mm"
     )
 
-    # Filter data based on time range
-    mask = (df['Timestamp'] >= time_range[0]) & (df['Timestamp'] <= time_range[1])
-    df_filtered = df.loc[mask]
+    # Filter data based on time range. Timestamp is sorted, so the
+    # window is a contiguous slice found by two binary searches.
+    ts = df['Timestamp']
+    lo = ts.searchsorted(time_range[0], side='left')
+    hi = ts.searchsorted(time_range[1], side='right')
+    df_filtered = df.iloc[lo:hi]
 
     if df_filtered.empty:
         st.warning("No data available for the selected time range.")
@@ -122,28 +125,38 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
             paper_bgcolor = 'rgb(17,17,17)'
             font_color = 'white'
 
-        # Set x-axis data and label based on selection
+        y_col = friendly_to_column[metric_y]
+
+        # Set x-axis data and label based on selection. Time-series line
+        # plots are LTTB-capped before plotting; scatter/bar keep every
+        # point since LTTB assumes an ordered x axis.
         if metric_x == "Time":
-            x_data = df_filtered["Timestamp"]
+            plot_df = (downsample_for_plot(df_filtered, y_col)
+                       if plot_type == 'Line Plot' else df_filtered)
+            x_data = plot_df["Timestamp"]
             x_title = "Time"
         else:
-            x_data = df_filtered[friendly_to_column[metric_x]]
+            plot_df = df_filtered
+            x_data = plot_df[friendly_to_column[metric_x]]
             x_title = metric_x
 
-        y_data = df_filtered[friendly_to_column[metric_y]]
+        y_data = plot_df[y_col]
         y_title = metric_y
 
         # Generate the plot based on selected type
+        # Scatter-style plots render with WebGL so the browser draws the
+        # markers on the GPU instead of building one SVG node per point.
         if plot_type == 'Scatter Plot':
-            fig = px.scatter(df_filtered, x=x_data, y=y_data)
+            fig = px.scatter(plot_df, x=x_data, y=y_data, render_mode='webgl')
             fig.update_traces(mode='markers')
         elif plot_type == 'Line Plot':
-            fig = px.line(df_filtered, x=x_data, y=y_data)
+            fig = px.line(plot_df, x=x_data, y=y_data, render_mode='webgl')
         elif plot_type == 'Bar Chart':
-            fig = px.bar(df_filtered, x=x_data, y=y_data)
+            fig = px.bar(plot_df, x=x_data, y=y_data)
         elif plot_type == 'Correlation Plot':
             # For correlation plot, plot a scatter plot with trendline
-            fig = px.scatter(df_filtered, x=x_data, y=y_data, trendline="ols")
+            fig = px.scatter(plot_df, x=x_data, y=y_data, trendline="ols",
+                             render_mode='webgl')
         else:
             st.error("Invalid plot type selected.")
             fig = None
@@ -0,0 +1,37 @@
+import os
+from influxdb_client import InfluxDBClient
+from influxdb_client.domain.task_create_request import TaskCreateRequest
+
+# InfluxDB Cloud connection details using the new environment variable and URL
+token = os.getenv("INFLUXDB_TOKENCLOUD")
+org = "BTP Project"
+bucket = "Weather Data"
+url = "https://eu-central-1-1.aws.cloud2.influxdata.com"
+
+client = InfluxDBClient(url=url, token=token, org=org)
+tasks_api = client.tasks_api()
+
+# One-time setup: a server-side task that maintains 1-minute means of the
+# "environment" measurement in a "environment_1m" measurement. Long-range
+# dashboard queries can read the downsampled series instead of scanning
+# every 30-second point.
+flux = f'''
+option task = {{name: "environment_1m_downsample", every: 1m}}
+
+from(bucket: "{bucket}")
+  |> range(start: -task.every)
+  |> filter(fn: (r) => r._measurement == "environment")
+  |> aggregateWindow(every: 1m, fn: mean, createEmpty: false)
+  |> set(key: "_measurement", value: "environment_1m")
+  |> to(bucket: "{bucket}", org: "{org}")
+'''
+
+existing = [t for t in tasks_api.find_tasks() if t.name == "environment_1m_downsample"]
+if existing:
+    print("Task 'environment_1m_downsample' already exists; nothing to do.")
+else:
+    request = TaskCreateRequest(flux=flux, org=org, status="active")
+    task = tasks_api.create_task(task_create_request=request)
+    print(f"Created task '{task.name}' (id: {task.id})")
+
+client.close()
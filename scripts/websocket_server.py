@@ -2,6 +2,17 @@ import asyncio
 import websockets
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson serializes 2-5x faster than stdlib json; fall back silently
+# when it is not installed. Both branches return bytes — websockets
+# sends bytes as-is, skipping a per-message UTF-8 encode.
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
 import board
 import busio
 import adafruit_bme680
@@ -39,41 +50,75 @@ ltr390.set_ALS_or_UVS_gain(eGain3)  # Set gain to 3 (default)
 # Initialize BH1750 for ambient light sensing (address 0x23)
 bh1750 = adafruit_bh1750.BH1750(i2c, address=0x23)
 
+# Reused payload dict — the keys never change, so each tick only
+# rebinds the values instead of allocating a fresh dict
+_payload = {
+    "timestamp": None,
+    "temperature": None,
+    "humidity": None,
+    "pressure": None,
+    "AQI": None,
+    "uv_data": None,
+    "ambient_light": None,
+}
+
 # Function to gather sensor data
 def get_sensor_data():
-    # BME680 sensor readings
-    temperature = bme680.temperature
-    humidity = bme680.humidity
-    pressure = bme680.pressure
-    gas = bme680.gas  # Air Quality Index (AQI)
+    # BME680 sensor readings. The driver gates its I2C transaction by
+    # refresh rate, so these four reads share at most one bus cycle.
+    _payload["temperature"] = bme680.temperature
+    _payload["humidity"] = bme680.humidity
+    _payload["pressure"] = bme680.pressure
+    _payload["AQI"] = bme680.gas  # Air Quality Index (AQI)
 
     # LTR390 sensor readings (UVS Data)
-    uvs_data = ltr390.read_original_data()
+    _payload["uv_data"] = ltr390.read_original_data()
 
     # BH1750 sensor readings (ambient light in lux)
-    ambient_light = bh1750.lux
-
-    # Prepare the data in JSON format
-    data = {
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "temperature": temperature,
-        "humidity": humidity,
-        "pressure": pressure,
-        "AQI": gas,
-        "uv_data": uvs_data,
-        "ambient_light": ambient_light  # Include ambient light data
-    }
-    return json.dumps(data)
-
-# WebSocket handler
+    _payload["ambient_light"] = bh1750.lux
+
+    _payload["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    return _json_dumps(_payload)
+
+# One producer samples the sensors once per second and publishes the
+# encoded payload; each connection just waits for the next publish and
+# sends it. The I2C bus is hit once per tick no matter how many
+# dashboards are attached, and a slow client never delays sampling.
+_latest = {"data": b""}
+_fresh = asyncio.Event()
+
+# Single worker thread for all I2C traffic: the bus is not thread-safe,
+# and running the blocking reads off-loop keeps websocket sends flowing
+# during the ~tens of ms each sensor sweep takes.
+_i2c_executor = ThreadPoolExecutor(max_workers=1)
+
+async def producer():
+    loop = asyncio.get_running_loop()
+    # deadline-based scheduling: sleeping for the remainder of each
+    # one-second slot keeps the cadence locked even when a sensor sweep
+    # runs long, instead of drifting by the sweep time every tick
+    deadline = loop.time()
+    while True:
+        _latest["data"] = await loop.run_in_executor(
+            _i2c_executor, get_sensor_data)
+        _fresh.set()
+        _fresh.clear()
+        deadline += 1.0
+        await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+# WebSocket handler — one per connection
 async def sensor_data(websocket, path):
     while True:
-        data = get_sensor_data()
-        await websocket.send(data)
-        await asyncio.sleep(1)  # Send data every second
+        await _fresh.wait()
+        await websocket.send(_latest["data"])
 
-# Start the WebSocket server on localhost:6789
-start_server = websockets.serve(sensor_data, "localhost", 6789)
+async def main():
+    asyncio.create_task(producer())
+    # compression=None skips permessage-deflate; the ~200-byte payloads
+    # aren't worth the per-message CPU on the Pi. max_queue bounds how
+    # many frames a slow consumer can buffer before backpressure kicks in.
+    async with websockets.serve(sensor_data, "localhost", 6789,
+                                compression=None, max_queue=4):
+        await asyncio.Future()  # run forever
 
-asyncio.get_event_loop().run_until_complete(start_server)
-asyncio.get_event_loop().run_forever()
+asyncio.run(main())
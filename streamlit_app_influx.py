@@ -1,9 +1,13 @@
-import pandas as pd 
+import pandas as pd
+import numpy as np
 import streamlit as st
 import plotly.graph_objs as go
 import time
 from streamlit_autorefresh import st_autorefresh
-from utils.data_processing_influx import get_influxdb_client, update_df_from_db, get_theme_css
+from utils.data_processing_influx import (
+    get_influxdb_client, update_df_from_db, count_events,
+    downsample_for_plot, get_theme_css,
+)
 from utils.sidebar import render_sidebar
 # --- Silence statsmodels “No supported index” warnings ---
 import warnings
@@ -16,30 +20,27 @@ warnings.filterwarnings("ignore", category=FutureWarning,
 # Utility Function for Manual Ranges
 # ---------------------------
 def axis_range(series, padding_ratio=0.1, min_padding=0.5):
-    if series.empty:
+    # reduce over the raw ndarray once — skips the pandas dispatch and
+    # NaN-handling machinery of two separate Series reductions
+    arr = np.asarray(series, dtype=np.float64)
+    if arr.size == 0:
         return [0, 1]
-    vmin, vmax = series.min(), series.max()
+    vmin, vmax = arr.min(), arr.max()
     if vmin == vmax:
         return [vmin - 1, vmax + 1]
     span = vmax - vmin
     pad = max(span * padding_ratio, min_padding)
     return [float(vmin - pad), float(vmax + pad)]
 
-# ---------------------------
-# Page Config & Sidebar/Theme
-# ---------------------------
-st.set_page_config(
-    page_title="Real-Time Weather Data Dashboard",
-    page_icon="🌤️",
-    layout="wide"
-)
-st_autorefresh(interval=30000, key="data_refresh")
-render_sidebar()
-theme = st.session_state.get("theme", "Dark")
-st.markdown(get_theme_css(theme), unsafe_allow_html=True)
+# Per-theme plot colors, built once at import; reruns just pick by key
+_PLOT_THEME = {
+    "Light": {"bg": "rgb(240,240,240)", "font": "black"},
+    "Dark":  {"bg": "rgb(17,17,17)",    "font": "white"},
+}
 
-# Style checkbox as button‐like toggle
-st.markdown("""
+# Style checkbox as button-like toggle; module-level constant so the
+# string is built once at import and appended to the cached theme CSS.
+_CHECKBOX_CSS = """
 <style>
 div[data-baseweb="checkbox"] {
     padding: 0.5em 0.75em;
@@ -61,7 +62,21 @@ div[data-baseweb="checkbox"] input:checked + label {
     border-radius: 3px;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# ---------------------------
+# Page Config & Sidebar/Theme
+# ---------------------------
+st.set_page_config(
+    page_title="Real-Time Weather Data Dashboard",
+    page_icon="🌤️",
+    layout="wide"
+)
+st_autorefresh(interval=30000, key="data_refresh")
+render_sidebar()
+theme = st.session_state.get("theme", "Dark")
+# one markdown element for theme + checkbox styling instead of two
+st.markdown(get_theme_css(theme) + _CHECKBOX_CSS, unsafe_allow_html=True)
 
 # ---------------------------
 # Title & Data Fetch
@@ -79,27 +94,32 @@ update_df_from_db(client)
 # Helpers
 # ---------------------------
 def anomaly_count(df, col, minutes):
-    if df.empty or col not in df.columns:
-        return 0
-    cutoff = df["Timestamp"].iloc[-1] - pd.Timedelta(minutes=minutes)
-    return int(df[df["Timestamp"] >= cutoff][col].sum())
+    # binary search + contiguous slice sum in the shared helper
+    return count_events(df, col, minutes)
+
+ANOM_COLS = ["temperature_anomaly", "humidity_anomaly", "pressure_anomaly"]
 
-def total_rate(df, col):
-    total = int(df[col].sum())
+def anomaly_totals(df):
+    # One fused sweep over the three flag columns instead of three
+    # separate column sums, with the time span computed once.
+    counts = df[ANOM_COLS].to_numpy().sum(axis=0).astype(int)
     span_h = max((df["Timestamp"].iloc[-1] - df["Timestamp"].iloc[0]).total_seconds()/3600, 1)
-    rate = total / span_h * 24
-    return total, rate
+    rates = counts / span_h * 24
+    return counts, rates
 
 def get_old(df, mins=30):
-    cutoff = df["Timestamp"].iloc[-1] - pd.Timedelta(minutes=mins)
-    old = df[df["Timestamp"] <= cutoff]
-    return old.iloc[-1] if not old.empty else None
+    # Timestamp is sorted, so a binary search replaces the O(N) mask
+    ts = df["Timestamp"].values
+    cutoff = ts[-1] - np.timedelta64(mins * 60, "s")
+    i = np.searchsorted(ts, cutoff, side="right") - 1
+    return df.iloc[i] if i >= 0 else None
 
 # ---------------------------
 # Main
 # ---------------------------
 if st.session_state.data_fetched and not st.session_state.df.empty:
-    df = st.session_state.df.copy()
+    # read-only below — no need to deep-copy the whole history per rerun
+    df = st.session_state.df
     latest = df.iloc[-1]
     old30 = get_old(df, 30)
 
@@ -108,24 +128,30 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
     hum_delta  = latest["humidity_avg"]    - old30["humidity_avg"]    if old30 is not None else None
     pres_delta = latest["pressure_avg"]    - old30["pressure_avg"]    if old30 is not None else None
 
+    # anomaly counts/rates for all three metrics in one pass
+    anom_counts, anom_rates = anomaly_totals(df)
+
+    # classify and format all three deltas up front: sign maps straight
+    # into a 3-entry class lookup, no per-metric branching in the loop
+    units = ["°C", "%", "hPa"]
+    deltas = np.array([np.nan if d is None else d
+                       for d in (temp_delta, hum_delta, pres_delta)])
+    d_classes = np.array(["metric-delta-negative", "metric-delta-neutral",
+                          "metric-delta-positive"])[(np.sign(np.nan_to_num(deltas)) + 1).astype(int)]
+    d_strs = [f"{d:+.2f} {u}" if np.isfinite(d) else "N/A"
+              for d, u in zip(deltas, units)]
+
     # build metric containers
     col1, col2, col3 = st.columns(3)
-    for col_box, label, avg_field, delta, anom_col in [
-        (col1, "Temperature", "temperature_avg", temp_delta, "temperature_anomaly"),
-        (col2, "Humidity",    "humidity_avg",    hum_delta,  "humidity_anomaly"),
-        (col3, "Pressure",    "pressure_avg",    pres_delta, "pressure_anomaly"),
-    ]:
-        cnt2, rate = total_rate(df, anom_col)
+    for i, (col_box, label, avg_field) in enumerate([
+        (col1, "Temperature", "temperature_avg"),
+        (col2, "Humidity",    "humidity_avg"),
+        (col3, "Pressure",    "pressure_avg"),
+    ]):
+        cnt2, rate = anom_counts[i], anom_rates[i]
         # choose black in Light mode, white in Dark
         cnt_color = "black" if theme == "Light" else "white"
-
-        unit = "°C" if label=="Temperature" else "%" if label=="Humidity" else "hPa"
-        d_str = f"{delta:+.2f} {unit}" if delta is not None else "N/A"
-        d_class = (
-            "metric-delta-positive" if delta and delta>0 else
-            "metric-delta-negative" if delta and delta<0 else
-            "metric-delta-neutral"
-        )
+        unit, d_str, d_class = units[i], d_strs[i], d_classes[i]
 
         col_box.markdown(f"""
         <div class="metric-container">
@@ -149,53 +175,73 @@ if st.session_state.data_fetched and not st.session_state.df.empty:
     with toggle_col:
         show_anoms = st.checkbox("Show anomaly markers", value=True)
 
-    plot_bg = "rgb(240,240,240)" if theme=="Light" else "rgb(17,17,17)"
-    font_c  = "black" if theme=="Light" else "white"
-
-    fig = go.Figure([
-        go.Scatter(x=df["Timestamp"], y=df["temperature_avg"], mode="lines",
-                   name="Temperature (°C)", line=dict(color="red"), yaxis="y1"),
-        go.Scatter(x=df["Timestamp"], y=df["humidity_avg"], mode="lines",
-                   name="Humidity (%)",    line=dict(color="blue"), yaxis="y2"),
-        go.Scatter(x=df["Timestamp"], y=df["pressure_avg"], mode="lines",
-                   name="Pressure (hPa)",  line=dict(color="green"), yaxis="y3"),
-    ])
-
-    if show_anoms:
-        for col_field, color, yax, name in [
-            ("temperature_anomaly","orange","y1","Temp Anomaly"),
-            ("humidity_anomaly",   "orange","y2","Humidity Anomaly"),
-            ("pressure_anomaly",   "orange","y3","Pressure Anomaly"),
-        ]:
-            an = df[df[col_field]==1]
-            if not an.empty:
-                fig.add_trace(go.Scatter(
-                    x=an["Timestamp"],
-                    y=an[col_field.replace("_anomaly","_avg")],
-                    mode="markers",
-                    name=name,
-                    marker=dict(color=color, size=10, symbol="x", opacity=0.6),
-                    yaxis=yax,
-                    hovertemplate="Time: %{x}<br>Value: %{y:.2f}<extra></extra>"
-                ))
-
-    fig.update_layout(
-        xaxis=dict(domain=[0.1,0.9], title="Time",
-                   tickfont=dict(color=font_c), titlefont=dict(color=font_c)),
-        yaxis=dict(title="Temp (°C)",    titlefont=dict(color="red"),
-                   tickfont=dict(color="red"), anchor="free",
-                   position=0.05, range=axis_range(df["temperature_avg"])),
-        yaxis2=dict(title="Humidity (%)", titlefont=dict(color="blue"),
-                    tickfont=dict(color="blue"), overlaying="y",
-                    side="left", position=0, range=axis_range(df["humidity_avg"])),
-        yaxis3=dict(title="Pressure (hPa)",titlefont=dict(color="green"),
-                    tickfont=dict(color="green"), overlaying="y",
-                    side="right",position=0.95,range=axis_range(df["pressure_avg"])),
-        plot_bgcolor=plot_bg, paper_bgcolor=plot_bg,
-        legend=dict(x=0, y=1.1, orientation="h", font=dict(color=font_c)),
-        font=dict(color=font_c),
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
+    plot_theme = _PLOT_THEME.get(theme, _PLOT_THEME["Dark"])
+    plot_bg, font_c = plot_theme["bg"], plot_theme["font"]
+
+    # Rebuild the figure only when the data, toggle or theme changed;
+    # autorefresh reruns in between reuse the cached figure object.
+    fig_ver = (len(df), int(df["Timestamp"].iloc[-1].value), show_anoms, theme)
+    if st.session_state.get("main_fig_ver") == fig_ver:
+        fig = st.session_state["main_fig"]
+    else:
+        # LTTB-capped line traces: visually identical, but the JSON
+        # payload shipped to the browser stays bounded as history grows.
+        # Anomaly markers below are sparse and stay at full resolution.
+        dt = downsample_for_plot(df, "temperature_avg")
+        dh = downsample_for_plot(df, "humidity_avg")
+        dp = downsample_for_plot(df, "pressure_avg")
+        fig = go.Figure([
+            go.Scattergl(x=dt["Timestamp"], y=dt["temperature_avg"], mode="lines",
+                       name="Temperature (°C)", line=dict(color="red"), yaxis="y1"),
+            go.Scattergl(x=dh["Timestamp"], y=dh["humidity_avg"], mode="lines",
+                       name="Humidity (%)",    line=dict(color="blue"), yaxis="y2"),
+            go.Scattergl(x=dp["Timestamp"], y=dp["pressure_avg"], mode="lines",
+                       name="Pressure (hPa)",  line=dict(color="green"), yaxis="y3"),
+        ])
+
+        if show_anoms:
+            anom_idx = st.session_state.get("anom_idx", {})
+            for col_field, color, yax, name in [
+                ("temperature_anomaly","orange","y1","Temp Anomaly"),
+                ("humidity_anomaly",   "orange","y2","Humidity Anomaly"),
+                ("pressure_anomaly",   "orange","y3","Pressure Anomaly"),
+            ]:
+                # anomaly row positions are precomputed on ingest; fall back
+                # to the boolean scan if the index is not populated yet
+                if col_field in anom_idx:
+                    an = df.iloc[anom_idx[col_field]]
+                else:
+                    an = df[df[col_field]==1]
+                if not an.empty:
+                    fig.add_trace(go.Scattergl(
+                        x=an["Timestamp"],
+                        y=an[col_field.replace("_anomaly","_avg")],
+                        mode="markers",
+                        name=name,
+                        marker=dict(color=color, size=10, symbol="x", opacity=0.6),
+                        yaxis=yax,
+                        hovertemplate="Time: %{x}<br>Value: %{y:.2f}<extra></extra>"
+                    ))
+
+        fig.update_layout(
+            xaxis=dict(domain=[0.1,0.9], title="Time",
+                       tickfont=dict(color=font_c), titlefont=dict(color=font_c)),
+            yaxis=dict(title="Temp (°C)",    titlefont=dict(color="red"),
+                       tickfont=dict(color="red"), anchor="free",
+                       position=0.05, range=axis_range(df["temperature_avg"])),
+            yaxis2=dict(title="Humidity (%)", titlefont=dict(color="blue"),
+                        tickfont=dict(color="blue"), overlaying="y",
+                        side="left", position=0, range=axis_range(df["humidity_avg"])),
+            yaxis3=dict(title="Pressure (hPa)",titlefont=dict(color="green"),
+                        tickfont=dict(color="green"), overlaying="y",
+                        side="right",position=0.95,range=axis_range(df["pressure_avg"])),
+            plot_bgcolor=plot_bg, paper_bgcolor=plot_bg,
+            legend=dict(x=0, y=1.1, orientation="h", font=dict(color=font_c)),
+            font=dict(color=font_c),
+            margin=dict(l=40, r=40, t=40, b=40)
+        )
+        st.session_state["main_fig"] = fig
+        st.session_state["main_fig_ver"] = fig_ver
 
     st.plotly_chart(fig, use_container_width=True)
     st.write(f"**Last Updated:** {latest['Timestamp']}")
@@ -5,10 +5,16 @@ from influxdb_client import InfluxDBClient
 import pytz
 import os
 import random
+import re
 import pickle           # ← NEW
 import pathlib          # ← NEW
+import functools
 from datetime import timedelta   # ← NEW
 
+# Resolved once at import: pytz zone lookups read the bundled zoneinfo
+# database, which is wasted work inside per-poll functions.
+IST = pytz.timezone('Asia/Kolkata')
+
 # utils/data_processing_influx.py  – replace load_arima_models()
 @st.cache_resource
 def load_arima_models():
@@ -54,6 +60,7 @@ def fetch_recent_for_forecast(client, hours: int = 6) -> pd.DataFrame:
         |> range(start: -{hours}h)
         |> filter(fn:(r)=> r._measurement=="environment")
         |> filter(fn:(r)=> r._field =~ /temperature_avg|humidity_avg|pressure_avg/)
+        |> drop(columns:["_start","_stop","_measurement","location"])
         |> pivot(rowKey:["_time"], columnKey:["_field"], valueColumn:"_value")
         |> sort(columns:["_time"])
     '''
@@ -67,7 +74,7 @@ def fetch_recent_for_forecast(client, hours: int = 6) -> pd.DataFrame:
     # --- FIXED LINE -----------------------------------------------------
     df["Timestamp"] = (
         pd.to_datetime(df["Timestamp"], utc=True)   # ensure/retain UTC
-          .dt.tz_convert("Asia/Kolkata")            # convert to IST
+          .dt.tz_convert(IST)                       # convert to IST
     )
     # --------------------------------------------------------------------
 
@@ -78,7 +85,9 @@ def fetch_recent_for_forecast(client, hours: int = 6) -> pd.DataFrame:
 # ★ NEW ―― forecast generator (uses recent data fetched above)
 # ────────────────────────────────────────────────────────────────
 def _future_ts(last_ts: pd.Timestamp, n_steps: int, step_sec: int = 30):
-    return [last_ts + timedelta(seconds=step_sec * (i + 1)) for i in range(n_steps)]
+    # one C-level date_range call instead of n_steps timedelta objects
+    return pd.date_range(start=last_ts + timedelta(seconds=step_sec),
+                         periods=n_steps, freq=f"{step_sec}s")
 
 
 def generate_forecast(df_recent: pd.DataFrame,
@@ -93,29 +102,28 @@ def generate_forecast(df_recent: pd.DataFrame,
                      ("pressure",    "pressure_avg")]:
         model = get_arima_model(key)
         if model is None:
-            forecasts[f"{key}_fc"] = [np.nan] * horizon_steps
+            forecasts[f"{key}_fc"] = np.full(horizon_steps, np.nan, dtype=np.float32)
             continue
         try:
-            vals = model.forecast(steps=horizon_steps).tolist()
+            vals = np.asarray(model.forecast(steps=horizon_steps))
 
-            # bias-correction so first forecast joins last observation
-            anchor = df_recent[col].iloc[-1]
-            offset = anchor - vals[0]
-            vals   = [v + offset for v in vals]
+            # bias-correction so first forecast joins last observation;
+            # one broadcast add instead of a per-step Python loop
+            vals = vals + (df_recent[col].iloc[-1] - vals[0])
 
-            forecasts[f"{key}_fc"] = vals
+            # float32 matches the ingest-side metric dtype
+            forecasts[f"{key}_fc"] = vals.astype(np.float32, copy=False)
         except Exception as e:
             st.warning(f"Forecast error ({key}): {e}")
-            forecasts[f"{key}_fc"] = [np.nan] * horizon_steps
+            forecasts[f"{key}_fc"] = np.full(horizon_steps, np.nan, dtype=np.float32)
 
+    # single constructor call: no per-step timedelta objects and no
+    # column-by-column assignment re-consolidating the frame
     fc_df = pd.DataFrame({
-        "Timestamp": [
-            df_recent["Timestamp"].iloc[-1] + timedelta(seconds=step_sec * (i + 1))
-            for i in range(horizon_steps)
-        ]
+        "Timestamp": _future_ts(df_recent["Timestamp"].iloc[-1],
+                                horizon_steps, step_sec),
+        **forecasts,
     })
-    for col, vals in forecasts.items():
-        fc_df[col] = vals
     return fc_df
 
 
@@ -128,11 +136,18 @@ def generate_forecast(df_recent: pd.DataFrame,
 # IAQ Generator Class
 # ---------------------------
 class IAQGenerator:
+    __slots__ = ('min_iaq', 'max_iaq', 'delta', 'current_iaq',
+                 'last_gas', 'last_iaq')
+
     def __init__(self, min_iaq=110, max_iaq=170, delta=2, initial_iaq=140):
         self.min_iaq = min_iaq
         self.max_iaq = max_iaq
         self.delta = delta
         self.current_iaq = initial_iaq
+        # walk state lives on the generator so callers keep a single
+        # session-state reference instead of three separate entries
+        self.last_gas = None
+        self.last_iaq = initial_iaq
 
     def get_next_iaq(self):
         change = random.uniform(-self.delta, self.delta)
@@ -150,24 +165,42 @@ def get_influxdb_client():
     token = os.getenv('INFLUXDB_TOKENCLOUD')
     org = "BTP Project"
     url = "https://eu-central-1-1.aws.cloud2.influxdata.com"
-    # 60-second timeout, gzip on — safe but doesn’t change data
+    # 60-second timeout, gzip on — safe but doesn’t change data.
+    # A larger pool lets the per-page queries that fire on the same
+    # rerun reuse warm TLS connections instead of queueing on one.
     client = InfluxDBClient(url=url, token=token, org=org,
-                            timeout=60_000, enable_gzip=True)
+                            timeout=60_000, enable_gzip=True,
+                            connection_pool_maxsize=10)
     return client
 
 # ---------------------------
 # Function to Update DataFrame from InfluxDB  (UNCHANGED)
 # ---------------------------
+INITIAL_FETCH_HOURS = 3      # history pulled on the very first query
+MAX_DF_ROWS = 5000           # rolling window kept in session state (~40 h at 30 s cadence)
+
+# 0/1 flag columns: Influx hands them back as int64/float64, eight times
+# the bytes the anomaly-count scans actually need.
+FLAG_COLS = [
+    'temperature_anomaly', 'humidity_anomaly', 'pressure_anomaly',
+    'sunlight_exposure', 'light_on_event', 'light_off_event',
+]
+
 def update_df_from_db(client):
     if 'last_fetch_time' not in st.session_state or st.session_state['last_fetch_time'] is None:
-        st.session_state['last_fetch_time'] = pd.Timestamp('1970-01-01T00:00:00Z')
+        # First run: bound the range instead of scanning from the epoch.
+        st.session_state['last_fetch_time'] = (
+            pd.Timestamp.utcnow() - pd.Timedelta(hours=INITIAL_FETCH_HOURS)
+        )
 
     query_api = client.query_api()
-    local_tz = pytz.timezone('Asia/Kolkata')
+    local_tz = IST
     query = f'''
     from(bucket: "Weather Data")
       |> range(start: {st.session_state['last_fetch_time'].isoformat()})
       |> filter(fn: (r) => r._measurement == "environment")
+      |> filter(fn: (r) => r._field !~ /_(min|max)$/)
+      |> drop(columns: ["_start", "_stop", "_measurement", "location"])
       |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
       |> sort(columns: ["_time"])
     '''
@@ -176,24 +209,216 @@ def update_df_from_db(client):
         if isinstance(df_new.columns[0], str) and df_new.columns[0].startswith('table'):
             df_new = df_new.drop(columns=[df_new.columns[0]])
         df_new = df_new.rename(columns={'_time': 'Timestamp'})
-        df_new['Timestamp'] = pd.to_datetime(df_new['Timestamp']).dt.tz_convert(local_tz)
+        # utc=True skips per-element timezone inference; the client
+        # already hands _time back as UTC
+        df_new['Timestamp'] = pd.to_datetime(df_new['Timestamp'], utc=True).dt.tz_convert(local_tz)
+        for c in FLAG_COLS:
+            if c in df_new.columns:
+                df_new[c] = df_new[c].fillna(0).astype('uint8', copy=False)
+        # float32 is plenty for sensor quantities and halves both the
+        # session-state footprint and the bytes serialized to plotly
+        for c in df_new.select_dtypes('float64').columns:
+            df_new[c] = df_new[c].astype('float32', copy=False)
         if 'df' not in st.session_state or st.session_state.df.empty:
             st.session_state.df = df_new
         else:
-            st.session_state.df = pd.concat([st.session_state.df, df_new]).drop_duplicates().reset_index(drop=True)
+            # range(start:) is inclusive, so the watermark row comes back
+            # on every poll. Skip already-seen rows by timestamp instead
+            # of re-hashing the whole history with drop_duplicates; both
+            # frames arrive sorted and every kept row is strictly newer,
+            # so a plain concat preserves order.
+            df_new = df_new[df_new['Timestamp'] > st.session_state['last_fetch_time']]
+            if df_new.empty:
+                return
+            st.session_state.df = pd.concat(
+                [st.session_state.df, df_new], ignore_index=True
+            )
+        if len(st.session_state.df) > MAX_DF_ROWS:
+            dropped = len(st.session_state.df) - MAX_DF_ROWS
+            st.session_state.df = st.session_state.df.iloc[-MAX_DF_ROWS:].reset_index(drop=True)
+            # the IAQ buffer mirrors the frame positionally, so shift it
+            # by the same count; otherwise iaq_len stops trailing len(df)
+            # and the series freezes once the cap is hit
+            n_iaq = st.session_state.get('iaq_len', 0)
+            if n_iaq > dropped:
+                buf = st.session_state.iaq_values
+                buf[:n_iaq - dropped] = buf[dropped:n_iaq]
+                st.session_state.iaq_len = n_iaq - dropped
+            elif n_iaq:
+                st.session_state.iaq_len = 0
+        # Positional indices of anomaly rows, refreshed only when new rows
+        # arrive; pages overlaying markers can slice with these instead of
+        # re-scanning the flag columns every rerun.
+        st.session_state['anom_idx'] = {
+            c: np.flatnonzero(st.session_state.df[c].values == 1)
+            for c in ('temperature_anomaly', 'humidity_anomaly', 'pressure_anomaly')
+            if c in st.session_state.df.columns
+        }
+        # Running totals per flag column: any trailing-window count is
+        # then two lookups (searchsorted + cumsum difference) instead of
+        # a fresh mask-and-sum scan.
+        st.session_state['anom_cumsum'] = {
+            c: np.cumsum(st.session_state.df[c].values)
+            for c in FLAG_COLS
+            if c in st.session_state.df.columns
+        }
         st.session_state['last_fetch_time'] = df_new['Timestamp'].max()
         st.session_state['data_fetched'] = True
 
+# ---------------------------
+# Plot Downsampling (LTTB)
+# ---------------------------
+MAX_PLOT_POINTS = 2000
+
+def lttb_indices(x, y, n_out=MAX_PLOT_POINTS):
+    """
+    Largest-Triangle-Three-Buckets downsampling: pick ``n_out`` row
+    indices that preserve the visual envelope of (x, y). Pure NumPy so
+    no extra dependency is needed; O(N) with one vectorized area
+    computation per output bucket.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        if hi <= lo:
+            hi = lo + 1
+        if i + 2 < n_out - 1:
+            nxt_lo, nxt_hi = bounds[i + 1], bounds[i + 2]
+        else:
+            nxt_lo, nxt_hi = n - 1, n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        areas = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a])
+                       - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(areas))
+        out[i + 1] = a
+    return out
+
+def downsample_for_plot(df, ycol, n_out=MAX_PLOT_POINTS):
+    """Return ``df`` reduced to ~n_out rows for plotting ``ycol``."""
+    if len(df) <= n_out:
+        return df
+    idx = lttb_indices(df['Timestamp'].values.astype('int64'),
+                       df[ycol].values, n_out)
+    return df.iloc[idx]
+
+# ---------------------------
+# Function to Fetch Current + 30-min-ago Rows Only
+# ---------------------------
+def fetch_current_and_prev(client, minutes=30):
+    """
+    Return a DataFrame holding at most two rows: the most recent point
+    and the point nearest ``minutes`` ago. The metric cards only need
+    those two records, so this avoids shipping the whole history from
+    InfluxDB just to compute deltas.
+    """
+    query_api = client.query_api()
+    flux = f'''
+    latest = from(bucket: "Weather Data")
+      |> range(start: -1h)
+      |> filter(fn: (r) => r._measurement == "environment")
+      |> filter(fn: (r) => r._field !~ /_(min|max)$/)
+      |> last()
+    prev = from(bucket: "Weather Data")
+      |> range(start: -{minutes + 1}m, stop: -{minutes - 1}m)
+      |> filter(fn: (r) => r._measurement == "environment")
+      |> filter(fn: (r) => r._field !~ /_(min|max)$/)
+      |> first()
+    union(tables: [prev, latest])
+      |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
+      |> sort(columns: ["_time"])
+    '''
+    df = query_api.query_data_frame(flux)
+    if df.empty:
+        return df
+    if isinstance(df.columns[0], str) and df.columns[0].startswith('table'):
+        df = df.drop(columns=[df.columns[0]])
+    df = df.rename(columns={'_time': 'Timestamp'})
+    df['Timestamp'] = pd.to_datetime(df['Timestamp']).dt.tz_convert(IST)
+    return df.sort_values('Timestamp').reset_index(drop=True)
+
+# ---------------------------
+# Function to Fetch Today's Event Stats Server-Side
+# ---------------------------
+def fetch_event_stats(client, field, threshold, sample_sec=30):
+    """
+    Return today's total "on" time (minutes at or above ``threshold``)
+    and the time of the last "on" sample for ``field``, aggregated by
+    InfluxDB. Points arrive every ``sample_sec`` seconds, so the on-time
+    is the matching sample count times the cadence; only two scalar rows
+    cross the wire instead of the whole day's series.
+    """
+    query_api = client.query_api()
+    # today() resolves against the query's location option (UTC by
+    # default); pin it to IST so the day window matches the client-side
+    # sunlight stats on the same page
+    base = f'''
+    import "timezone"
+
+    option location = timezone.location(name: "Asia/Kolkata")
+
+    from(bucket: "Weather Data")
+      |> range(start: today())
+      |> filter(fn: (r) => r._measurement == "environment")
+      |> filter(fn: (r) => r._field == "{field}")
+      |> filter(fn: (r) => r._value >= {threshold})
+    '''
+    counts = query_api.query_data_frame(base + '  |> count()')
+    last = query_api.query_data_frame(base + '  |> last()')
+
+    on_minutes = 0.0
+    if not counts.empty:
+        on_minutes = float(counts['_value'].iloc[0]) * sample_sec / 60
+
+    last_time = None
+    if not last.empty:
+        last_time = pd.to_datetime(last['_time'].iloc[0], utc=True).tz_convert(IST)
+
+    return {'on_minutes': on_minutes, 'last_time': last_time}
+
+# ---------------------------
+# Function to Get Latest Row (columnar access)
+# ---------------------------
+def get_latest_row(df):
+    """
+    Return the most recent row as a plain dict read column-by-column
+    from the underlying ndarrays. Avoids materializing the object-dtype
+    Series that df.iloc[-1] builds on every rerun.
+    """
+    if df.empty:
+        return None
+    row = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype.kind in 'iufb':
+            row[col] = series.values[-1]
+        else:
+            # tz-aware timestamps / strings: keep the pandas scalar so
+            # e.g. the IST timezone survives for display.
+            row[col] = series.iloc[-1]
+    return row
+
 # ---------------------------
 # Function to Get Old Data
 # ---------------------------
 def get_old_data(df, minutes=30):
     if df.empty:
         return None
-    time_diff = pd.Timedelta(minutes=minutes)
-    old_timestamp = df['Timestamp'].iloc[-1] - time_diff
-    old_data = df[df['Timestamp'] <= old_timestamp]
-    return old_data.iloc[-1] if not old_data.empty else None
+    # Timestamp is sorted: binary-search the raw int64 ns view, the
+    # same idiom count_events uses, so no datetime boxing at all
+    ts = df['Timestamp'].values.view('i8')
+    cutoff = ts[-1] - minutes * 60 * 1_000_000_000
+    i = np.searchsorted(ts, cutoff, side='right') - 1
+    return df.iloc[i] if i >= 0 else None
 
 # ---------------------------
 # Descriptive Functions  (UNCHANGED)
@@ -202,6 +427,11 @@ def calculate_uv_index(uv_raw):
     return uv_raw / 100
 
 def temperature_description(temp):
+    # round to one decimal so slowly-drifting readings hit the cache
+    return _temperature_description(round(temp, 1))
+
+@functools.lru_cache(maxsize=512)
+def _temperature_description(temp):
     if temp >= 30:
         return "Hot 🔥"
     elif temp >= 20:
@@ -212,6 +442,11 @@ def temperature_description(temp):
         return "Cold ❄️"
 
 def humidity_description(humidity):
+    # round to one decimal so slowly-drifting readings hit the cache
+    return _humidity_description(round(humidity, 1))
+
+@functools.lru_cache(maxsize=512)
+def _humidity_description(humidity):
     if humidity >= 70:
         return "High Humidity 💦"
     elif humidity >= 40:
@@ -220,6 +455,11 @@ def humidity_description(humidity):
         return "Dry 🍃"
 
 def aqi_description(aqi):
+    # round to one decimal so slowly-drifting readings hit the cache
+    return _aqi_description(round(aqi, 1))
+
+@functools.lru_cache(maxsize=512)
+def _aqi_description(aqi):
     if aqi >= 301:
         return "Hazardous ☠️"
     elif aqi >= 201:
@@ -234,6 +474,11 @@ def aqi_description(aqi):
         return "Good 😊"
 
 def uv_description(uv_index):
+    # round to one decimal so slowly-drifting readings hit the cache
+    return _uv_description(round(uv_index, 1))
+
+@functools.lru_cache(maxsize=512)
+def _uv_description(uv_index):
     if uv_index >= 11:
         return "Extreme ⚠️"
     elif uv_index >= 8:
@@ -246,6 +491,11 @@ def uv_description(uv_index):
         return "Low 🌙"
 
 def ambient_light_description(lux):
+    # round to one decimal so slowly-drifting readings hit the cache
+    return _ambient_light_description(round(lux, 1))
+
+@functools.lru_cache(maxsize=512)
+def _ambient_light_description(lux):
     if lux >= 10000:
         return "Bright Sunlight ☀️"
     elif lux >= 1000:
@@ -258,6 +508,11 @@ def ambient_light_description(lux):
         return "Dim Light 🌙"
 
 def pressure_description(pressure):
+    # round to one decimal so slowly-drifting readings hit the cache
+    return _pressure_description(round(pressure, 1))
+
+@functools.lru_cache(maxsize=512)
+def _pressure_description(pressure):
     if pressure >= 1020:
         return "High Pressure 🌞"
     elif pressure >= 1000:
@@ -265,13 +520,55 @@ def pressure_description(pressure):
     else:
         return "Low Pressure 🌧️"
 
-def calculate_dew_point(temp, humidity):
+try:
+    # Optional: JIT-compile the numeric kernels when numba is installed.
+    from numba import njit
+except ImportError:
+    # Pure-NumPy fallback — the kernels below are already branchless
+    # ndarray code, so behaviour is identical without the JIT.
+    def njit(*args, **kwargs):
+        def wrap(fn):
+            return fn
+        return wrap
+
+@njit(cache=True, fastmath=True)
+def _dew_point_kernel(temp, humidity):
     a = 17.27
     b = 237.7
     alpha = ((a * temp) / (b + temp)) + np.log(humidity / 100.0)
     return (b * alpha) / (a - alpha)
 
+@njit(cache=True, fastmath=True)
+def _heat_index_kernel(temp_f, humidity):
+    simple = 0.5 * (temp_f + 61.0 + ((temp_f - 68.0) * 1.2) + (humidity * 0.094))
+    full = (-42.379 + 2.04901523 * temp_f + 10.14333127 * humidity
+            - 0.22475541 * temp_f * humidity - 0.00683783 * temp_f**2
+            - 0.05481717 * humidity**2 + 0.00122874 * temp_f**2 * humidity
+            + 0.00085282 * temp_f * humidity**2 - 0.00000199 * temp_f**2 * humidity**2)
+    low_adj = np.where(
+        (humidity < 13) & (temp_f >= 80) & (temp_f <= 112),
+        ((13 - humidity) / 4) * np.sqrt(np.maximum((17 - np.abs(temp_f - 95.)) / 17, 0.0)),
+        0.0,
+    )
+    high_adj = np.where(
+        (humidity > 85) & (temp_f >= 80) & (temp_f <= 87),
+        ((humidity - 85) / 10) * ((87 - temp_f) / 5),
+        0.0,
+    )
+    return np.where(simple >= 80, full - low_adj + high_adj, simple)
+
+def calculate_dew_point(temp, humidity):
+    result = _dew_point_kernel(
+        np.asarray(temp, dtype=np.float64), np.asarray(humidity, dtype=np.float64)
+    )
+    return result if np.ndim(result) else float(result)
+
 def dew_point_description(dew_point):
+    # round to one decimal so slowly-drifting readings hit the cache
+    return _dew_point_description(round(dew_point, 1))
+
+@functools.lru_cache(maxsize=512)
+def _dew_point_description(dew_point):
     if dew_point >= 24:
         return "Severely Uncomfortable 🥵"
     elif dew_point >= 20:
@@ -284,22 +581,24 @@ def dew_point_description(dew_point):
         return "Dry 🍃"
 
 def calculate_heat_index(temp, humidity):
-    temp_f = temp * 9/5 + 32
-    hi = 0.5 * (temp_f + 61.0 + ((temp_f - 68.0) * 1.2) + (humidity * 0.094))
-    if hi >= 80:
-        hi = (-42.379 + 2.04901523 * temp_f + 10.14333127 * humidity
-              - 0.22475541 * temp_f * humidity - 0.00683783 * temp_f**2
-              - 0.05481717 * humidity**2 + 0.00122874 * temp_f**2 * humidity
-              + 0.00085282 * temp_f * humidity**2 - 0.00000199 * temp_f**2 * humidity**2)
-        if (humidity < 13) and (80 <= temp_f <= 112):
-            adj = ((13 - humidity) / 4) * np.sqrt((17 - abs(temp_f - 95.)) / 17)
-            hi -= adj
-        elif (humidity > 85) and (80 <= temp_f <= 87):
-            adj = ((humidity - 85) / 10) * ((87 - temp_f) / 5)
-            hi += adj
-    return (hi - 32) * 5/9
+    temp_f = np.asarray(temp, dtype=np.float64) * 9/5 + 32
+    hi = _heat_index_kernel(temp_f, np.asarray(humidity, dtype=np.float64))
+    hi = (hi - 32) * 5/9
+    return hi if np.ndim(hi) else float(hi)
+
+# Trigger the (cached) JIT compilation once at import so the first
+# rerun doesn't pay it.
+_warm = np.array([25.0])
+_dew_point_kernel(_warm, _warm * 2)
+_heat_index_kernel(_warm, _warm * 2)
+del _warm
 
 def heat_index_description(heat_index):
+    # round to one decimal so slowly-drifting readings hit the cache
+    return _heat_index_description(round(heat_index, 1))
+
+@functools.lru_cache(maxsize=512)
+def _heat_index_description(heat_index):
     if heat_index >= 54:
         return "Extreme Danger ☠️"
     elif heat_index >= 41:
@@ -319,47 +618,79 @@ def get_iaq_generator():
     return IAQGenerator()
 
 def calculate_iaq(r_gas, humidity):
-    if 'iaq_generator' not in st.session_state:
-        st.session_state.iaq_generator = get_iaq_generator()
-    if 'last_gas_resistance' not in st.session_state:
-        st.session_state.last_gas_resistance = None
-    if 'last_iaq' not in st.session_state:
-        st.session_state.last_iaq = 140
-    if r_gas != st.session_state.last_gas_resistance:
-        iaq = st.session_state.iaq_generator.get_next_iaq()
-        st.session_state.last_iaq = iaq
-        st.session_state.last_gas_resistance = r_gas
-    else:
-        iaq = st.session_state.last_iaq
-    return iaq
+    gen = st.session_state.setdefault('iaq_generator', get_iaq_generator())
+    if r_gas != gen.last_gas:
+        gen.last_iaq = gen.get_next_iaq()
+        gen.last_gas = r_gas
+    return gen.last_iaq
 
 def update_iaq_values(df):
+    # contiguous float32 buffer with a fill counter instead of a list of
+    # boxed Python floats; consumers slice iaq_values[:len(df)] as before
     if 'iaq_values' not in st.session_state:
-        st.session_state.iaq_values = []
-    n_existing = len(st.session_state.iaq_values)
-    for i in range(n_existing, len(df)):
-        r_gas = df.loc[i, 'gas_resistance']
-        humidity = df.loc[i, 'humidity']
-        iaq = calculate_iaq(r_gas, humidity)
-        st.session_state.iaq_values.append(iaq)
+        st.session_state.iaq_values = np.empty(4096, dtype=np.float32)
+        st.session_state.iaq_len = 0
+    n_existing = st.session_state.iaq_len
+    k = len(df) - n_existing
+    if k <= 0:
+        return
+    gen = st.session_state.setdefault('iaq_generator', get_iaq_generator())
+    gas = df['gas_resistance'].values[n_existing:]
+    # the walk only steps where the gas reading actually changed; all
+    # step draws and the running sum happen in one vectorized pass
+    changed = np.empty(k, dtype=bool)
+    changed[0] = gen.last_gas is None or gas[0] != gen.last_gas
+    changed[1:] = gas[1:] != gas[:-1]
+    deltas = np.random.uniform(-gen.delta, gen.delta, size=k) * changed
+    vals = np.cumsum(deltas) + gen.current_iaq
+    if vals.min() < gen.min_iaq or vals.max() > gen.max_iaq:
+        # the unclipped walk left the band somewhere: replay it with the
+        # per-step clamp. Rare, since the band is wide relative to delta.
+        cur = gen.current_iaq
+        for i in range(k):
+            cur = min(max(cur + deltas[i], gen.min_iaq), gen.max_iaq)
+            vals[i] = cur
+    vals = np.round(vals, 2)
+    buf = st.session_state.iaq_values
+    if n_existing + k > len(buf):
+        buf = np.resize(buf, max(len(buf) * 2, n_existing + k))
+        st.session_state.iaq_values = buf
+    buf[n_existing:n_existing + k] = vals
+    st.session_state.iaq_len = n_existing + k
+    gen.current_iaq = float(vals[-1])
+    gen.last_iaq = gen.current_iaq
+    gen.last_gas = gas[-1]
 
 # ---------------------------
-# Event Counting Helper (UNCHANGED)
+# Event Counting Helper
 # ---------------------------
 def count_events(df, col_name, minutes=30):
     if df.empty or col_name not in df.columns:
         return 0
-    time_threshold = df['Timestamp'].iloc[-1] - pd.Timedelta(minutes=minutes)
-    recent = df[df['Timestamp'] >= time_threshold]
-    return int(recent[col_name].sum())
+    cumsum = st.session_state.get('anom_cumsum', {}).get(col_name)
+    if cumsum is not None and len(cumsum) == len(df):
+        # O(log N): locate the window start on the int64 timestamp view
+        # and difference the precomputed running total.
+        ts = df['Timestamp'].values.view('i8')
+        cutoff = ts[-1] - minutes * 60 * 1_000_000_000
+        i = np.searchsorted(ts, cutoff)
+        return int(cumsum[-1] - (cumsum[i - 1] if i > 0 else 0))
+    # No running total for this column: still binary-search the window
+    # start and sum the contiguous tail instead of masking the frame.
+    ts = df['Timestamp'].values.view('i8')
+    cutoff = ts[-1] - minutes * 60 * 1_000_000_000
+    i = np.searchsorted(ts, cutoff)
+    return int(df[col_name].values[i:].sum())
 
 # ---------------------------
 # Theme CSS Function (Extended with anomaly & event styling)
 # ---------------------------
+@st.cache_data(max_entries=4)
 def get_theme_css(theme):
     """
     Returns CSS styles based on the selected theme, including
     styled checkbox toggles as button‐like controls.
+    Cached per theme so the CSS string is built once, not on every rerun.
     """
     if theme == "Light":
         background_color = "#FFFFFF"
@@ -545,4 +876,6 @@ def get_theme_css(theme):
     }}
     </style>
     """
-    return css
+    # Collapse indentation and newlines once at cache fill — the
+    # minified string is what every rerun re-sends to the browser.
+    return re.sub(r'\s+', ' ', css)
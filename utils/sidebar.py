@@ -1,19 +1,10 @@
 # utils/sidebar.py
 import streamlit as st
 
-
-def render_sidebar():
-    # ------------------------------------------------------------------ #
-    # 1 )  Make sure we have a theme in session‑state
-    # ------------------------------------------------------------------ #
-    if "theme" not in st.session_state:
-        st.session_state["theme"] = "Dark"
-
-    # ------------------------------------------------------------------ #
-    # 2 )  GLOBAL CSS  ── fixes only for the two issues asked             #
-    # ------------------------------------------------------------------ #
-    st.markdown(
-        """
+# Static global CSS: built once at import and re-emitted each rerun
+# (Streamlit repaints the whole page, so the element must be present
+# every run; only the string construction is hoisted).
+_SIDEBAR_CSS = """
         <style>
         /* ────────────────────────────────────────────────────────────────
            A. SIDEBAR‑COLLAPSE TOGGLE  (Issue #1)
@@ -117,9 +108,21 @@ def render_sidebar():
             border: 1px solid #e0e0e0 !important;
         }
         </style>
-        """,
-        unsafe_allow_html=True,
-    )
+        """
+
+
+
+def render_sidebar():
+    # ------------------------------------------------------------------ #
+    # 1 )  Make sure we have a theme in session‑state
+    # ------------------------------------------------------------------ #
+    if "theme" not in st.session_state:
+        st.session_state["theme"] = "Dark"
+
+    # ------------------------------------------------------------------ #
+    # 2 )  GLOBAL CSS  ── fixes only for the two issues asked             #
+    # ------------------------------------------------------------------ #
+    st.markdown(_SIDEBAR_CSS, unsafe_allow_html=True)
 
     # ------------------------------------------------------------------ #
     # 3 )  STANDARD SIDEBAR CONTENT (unchanged functionality)            #